@@ -6,37 +6,65 @@ Stage 2: Use LLM (LangChain + OpenAI) to enrich items with summary, topics, sent
 Now token-safe:
 - If an article is short -> single-shot summary (as before).
 - If long -> chunk into overlapping pieces, summarize each chunk, then combine into a final JSON.
+- Short articles are packed ANALYSIS_GROUP_SIZE at a time into one request (fewer requests vs RPM limits).
 - Progress-friendly (tqdm), periodic throughput, and clear final summary.
+- Cached: results are stored in analysis_results/analysis_cache.sqlite keyed by model, prompt version
+  and article content, so reruns over the same articles skip the LLM.
+- Concurrent: up to ANALYSIS_CONCURRENCY LLM requests are in flight at once (asyncio + llm.ainvoke),
+  including the chunk summaries of one long article; output order still matches input order.
+- Routed: with ANALYSIS_SMALL_MODEL set, short articles (and groups made only of short articles)
+  go to that cheaper model; everything else, including all chunk/combine calls, uses MODEL.
+- Streaming: the input is parsed while earlier articles are being analyzed (bounded queue), and
+  results are written as soon as everything before them is done.
 
 Environment toggles:
   MODEL=gpt-4o-mini
+  ANALYSIS_SMALL_MODEL=           # cheaper model for short articles, e.g. gpt-4.1-nano (empty = off)
+  ANALYSIS_SMALL_MODEL_TOKENS=400 # articles under this many tokens go to ANALYSIS_SMALL_MODEL
   OUTPUT_DIR=news_data
   ANALYSIS_DIR=analysis_results
   ANALYSIS_LOG_EVERY=50
   ANALYSIS_MAX_ITEMS=0            # 0 = process all
-
-  # Chunking & limits (character-based; keeps us under context window)
-  ANALYSIS_SINGLE_SHOT_CHARS=12000
-  ANALYSIS_CHUNK_CHARS=6000
-  ANALYSIS_CHUNK_OVERLAP=500
+  ANALYSIS_CONCURRENCY=20         # max LLM requests in flight
+  OPENAI_RPM=0                    # requests/minute budget (0 = unthrottled)
+  OPENAI_TPM=0                    # tokens/minute budget (0 = unthrottled)
+  ANALYSIS_CACHE=true             # reuse cached analyses across runs
+  ANALYSIS_FSYNC_EVERY=500        # flush + fsync output every N written items (0 = only at the end)
+
+  # Chunking & limits (in tokens, counted with tiktoken for MODEL; keeps us under context window)
+  ANALYSIS_SINGLE_SHOT_TOKENS=8000
+  ANALYSIS_CHUNK_TOKENS=3000
+  ANALYSIS_CHUNK_OVERLAP=200
   ANALYSIS_MAX_CHUNKS=10          # cap the number of chunk summaries used for combine
+  ANALYSIS_GROUP_SIZE=5           # short articles per request (1 = one request per article)
+  ANALYSIS_GROUP_TOKENS=2000      # max combined text of one group
 
 Notes:
-- We keep everything dependency-light: pure character-based chunking (no extra token libs).
-- If your model has a very small context, lower SINGLE_SHOT_CHARS and CHUNK_CHARS accordingly.
+- Token counts come from tiktoken's encoding for MODEL (o200k_base for unknown models). If the
+  encoding can't be loaded (e.g. offline, first run), we fall back to ~4 characters per token.
+- If your model has a very small context, lower SINGLE_SHOT_TOKENS and CHUNK_TOKENS accordingly.
 """
 
 from __future__ import annotations
-import json
+import asyncio
+import hashlib
 import os
+import sqlite3
 import sys
 import time
+from collections import Counter
+from functools import lru_cache
+from itertools import islice
 from pathlib import Path
-from typing import Iterable, List
+from typing import AsyncIterable, Iterable, Iterator, List, Literal
 
+import httpx
+import orjson
+import tiktoken
 from dotenv import load_dotenv
 from pydantic import BaseModel, Field
-from tenacity import retry, stop_after_attempt, wait_exponential_jitter
+import openai
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential_jitter
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from tqdm import tqdm
@@ -44,19 +72,39 @@ from tqdm import tqdm
 load_dotenv()
 
 INPUT_DIR = Path(os.getenv("OUTPUT_DIR", "news_data"))
-OUT_DIR = Path(os.getenv("ANALYSIS_DIR", "analysis_results"))
-OUT_DIR.mkdir(parents=True, exist_ok=True)
+OUT_DIR = Path(os.getenv("ANALYSIS_DIR", "analysis_results"))  # created by main() / the cache
 
 MODEL = os.getenv("MODEL", "gpt-4o-mini")
+# Optional cheaper model for short articles (empty = every request uses MODEL)
+SMALL_MODEL = os.getenv("ANALYSIS_SMALL_MODEL", "")
+SMALL_MODEL_TOKENS = int(os.getenv("ANALYSIS_SMALL_MODEL_TOKENS", "400"))
 LOG_EVERY = int(os.getenv("ANALYSIS_LOG_EVERY", "50"))
 MAX_ITEMS = int(os.getenv("ANALYSIS_MAX_ITEMS", "0"))  # 0 = all
+CONCURRENCY = max(1, int(os.getenv("ANALYSIS_CONCURRENCY", "20")))
+# Proactive throttling to the account's rate limits (0 = off)
+OPENAI_RPM = int(os.getenv("OPENAI_RPM", "0"))
+OPENAI_TPM = int(os.getenv("OPENAI_TPM", "0"))
+# Added to the input estimate of every request for TPM: system prompt + expected reply
+REQUEST_OVERHEAD_TOKENS = 600
+USE_CACHE = os.getenv("ANALYSIS_CACHE", "true").lower() in {"1", "true", "yes", "on"}
+CACHE_PATH = OUT_DIR / "analysis_cache.sqlite"
+FSYNC_EVERY = int(os.getenv("ANALYSIS_FSYNC_EVERY", "500"))
+IO_BUFFER = 1 << 20  # 1 MiB file buffers for input/output JSONL
+# Bump when prompts/output shape change so cached analyses are recomputed
+PROMPT_VERSION = "3"
 
 # Token-safety & chunking
-SINGLE_SHOT_CHAR_LIMIT = int(os.getenv("ANALYSIS_SINGLE_SHOT_CHARS", "12000"))
-CHUNK_CHARS = int(os.getenv("ANALYSIS_CHUNK_CHARS", "6000"))
-CHUNK_OVERLAP = int(os.getenv("ANALYSIS_CHUNK_OVERLAP", "500"))
+SINGLE_SHOT_TOKEN_LIMIT = int(os.getenv("ANALYSIS_SINGLE_SHOT_TOKENS", "8000"))
+CHUNK_TOKENS = int(os.getenv("ANALYSIS_CHUNK_TOKENS", "3000"))
+CHUNK_OVERLAP = int(os.getenv("ANALYSIS_CHUNK_OVERLAP", "200"))
 MAX_CHUNKS = int(os.getenv("ANALYSIS_MAX_CHUNKS", "10"))
 
+# Packing short articles into one request
+GROUP_SIZE = max(1, int(os.getenv("ANALYSIS_GROUP_SIZE", "5")))
+GROUP_TOKENS = int(os.getenv("ANALYSIS_GROUP_TOKENS", "2000"))
+# Rough estimate used only when tiktoken can't load an encoding
+CHARS_PER_TOKEN = 4
+
 class EnrichedItem(BaseModel):
     id: str
     source: str
@@ -71,12 +119,21 @@ class EnrichedItem(BaseModel):
     topics: list[str] = Field(default_factory=list)
     sentiment: str | None = None
 
+class SummaryPayload(BaseModel):
+    """Analysis returned by the model (OpenAI structured outputs enforce this schema)."""
+    summary: str
+    topics: list[str]
+    sentiment: Literal["Positive", "Neutral", "Negative"]
+
+class GroupPayload(BaseModel):
+    """Analyses of a packed group of articles, one per input in order."""
+    items: list[SummaryPayload]
+
 # Prompts
 SINGLE_PROMPT = ChatPromptTemplate.from_messages([
     ("system",
      "You are a concise analyst. Summarize the article in 3–4 sentences, propose 3–5 topical tags, "
-     "and label overall sentiment as Positive/Neutral/Negative. Return valid JSON with keys: "
-     "summary, topics (array), sentiment."),
+     "and label overall sentiment as Positive/Neutral/Negative."),
     ("human",
      "Title: {title}\n\n"
      "Article text (may be truncated):\n{article_text}")
@@ -95,89 +152,376 @@ COMBINE_PROMPT = ChatPromptTemplate.from_messages([
     ("system",
      "You will receive multiple short summaries from different parts of the SAME article. "
      "Write ONE overall 3–4 sentence summary (avoid repetition), propose 3–5 topical tags, "
-     "and set sentiment as Positive/Neutral/Negative. Return valid JSON with keys: "
-     "summary, topics (array), sentiment."),
+     "and set sentiment as Positive/Neutral/Negative."),
     ("human",
      "Title: {title}\n\nChunk summaries (each corresponds to a different part of the article):\n{chunk_summaries}")
 ])
 
-# LLM client
-llm = ChatOpenAI(model=MODEL, temperature=0.2)
+GROUP_PROMPT = ChatPromptTemplate.from_messages([
+    ("system",
+     "You are a concise analyst. The user sends {n} separate articles, each wrapped in <<<ARTICLE k ...>>>. "
+     "For EACH article: summarize it in 3–4 sentences, propose 3–5 topical tags, and label overall sentiment "
+     "as Positive/Neutral/Negative. Return exactly {n} items, one per input article, in order."),
+    ("human", "{articles}")
+])
+
+# LLM client: one pooled HTTP client for every request, so TCP/TLS connections stay warm
+_HTTP_CLIENT = httpx.AsyncClient(
+    limits=httpx.Limits(max_connections=max(CONCURRENCY, 64), max_keepalive_connections=max(CONCURRENCY, 64)),
+    timeout=60.0,
+)
+# max_retries=0: _llm_retry below owns retries (the SDK's own would multiply with it)
+llm = ChatOpenAI(model=MODEL, temperature=0.2, max_retries=0, http_async_client=_HTTP_CLIENT)
+llm_small = (ChatOpenAI(model=SMALL_MODEL, temperature=0.2, max_retries=0, http_async_client=_HTTP_CLIENT)
+             if SMALL_MODEL else llm)
+
+# Chains are built once and reused for every article; all JSON replies come back as
+# validated SummaryPayload / GroupPayload objects (no JSON extraction needed)
+_structured_llm = llm.with_structured_output(SummaryPayload, method="json_schema")
+SINGLE_CHAIN = SINGLE_PROMPT | _structured_llm
+CHUNK_CHAIN = CHUNK_PROMPT | llm
+COMBINE_CHAIN = COMBINE_PROMPT | _structured_llm
+GROUP_CHAIN = GROUP_PROMPT | llm.with_structured_output(GroupPayload, method="json_schema")
+# Same prompts on SMALL_MODEL, for short single-shot articles and all-short groups
+SINGLE_CHAIN_SMALL = SINGLE_PROMPT | llm_small.with_structured_output(SummaryPayload, method="json_schema")
+GROUP_CHAIN_SMALL = GROUP_PROMPT | llm_small.with_structured_output(GroupPayload, method="json_schema")
+
+class RateLimiter:
+    """
+    Request + token buckets refilled continuously at rpm/60 and tpm/60 per second.
+    acquire() waits until both have room, so we stay under the API limits up front
+    instead of collecting 429s and backing off. A limit of 0 disables that bucket.
+    """
+
+    def __init__(self, rpm: int, tpm: int) -> None:
+        self.rpm, self.tpm = rpm, tpm
+        self.req_avail = float(rpm)
+        self.tok_avail = float(tpm)
+        self.last = time.monotonic()
+        self._lock = asyncio.Lock()  # waiters are served in arrival order
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed, self.last = now - self.last, now
+        self.req_avail = min(self.rpm, self.req_avail + elapsed * self.rpm / 60)
+        self.tok_avail = min(self.tpm, self.tok_avail + elapsed * self.tpm / 60)
+
+    async def acquire(self, tokens: int) -> None:
+        tokens = min(tokens, self.tpm)  # a request bigger than the bucket must still pass eventually
+        async with self._lock:
+            while True:
+                self._refill()
+                wait = 0.0
+                if self.rpm and self.req_avail < 1:
+                    wait = (1 - self.req_avail) * 60 / self.rpm
+                if self.tpm and self.tok_avail < tokens:
+                    wait = max(wait, (tokens - self.tok_avail) * 60 / self.tpm)
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+            if self.rpm:
+                self.req_avail -= 1
+            self.tok_avail -= tokens
+
+# Retry only what a retry can fix: 429s, connection problems/timeouts and 5xx. Bad requests and
+# schema/parse errors fail right away (a group then falls back to per-article calls).
+_llm_retry = retry(
+    retry=retry_if_exception_type((
+        openai.RateLimitError,
+        openai.APIConnectionError,  # includes APITimeoutError
+        openai.InternalServerError,
+    )),
+    stop=stop_after_attempt(5),
+    wait=wait_exponential_jitter(initial=1, max=30),
+    reraise=True,
+)
+
+# Caps in-flight LLM requests (articles, chunks and groups alike); released during retry backoff
+_LLM_SLOTS = asyncio.Semaphore(CONCURRENCY)
+_RATE = RateLimiter(OPENAI_RPM, OPENAI_TPM) if OPENAI_RPM > 0 or OPENAI_TPM > 0 else None
+# Requests sent per model (retries included), for the final summary
+_REQUESTS: Counter[str] = Counter()
+
+async def _ainvoke(chain, inputs: dict, model: str = MODEL):
+    async with _LLM_SLOTS:
+        if _RATE is not None:
+            est = REQUEST_OVERHEAD_TOKENS + sum(_count_tokens(str(v)) for v in inputs.values())
+            await _RATE.acquire(est)
+        _REQUESTS[model] += 1
+        return await chain.ainvoke(inputs)
+
+# --- Cache -------------------------------------------------------------------
+
+class AnalysisCache:
+    """
+    Persistent analysis cache (SQLite): key -> JSON {summary, topics, sentiment}.
+    Keys cover the model that answered, PROMPT_VERSION, the article's content_hash and the text
+    sent to the model.
+    """
+
+    COMMIT_EVERY = 50
+
+    def __init__(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(path)
+        self._db.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT, ts INTEGER)")
+        self._pending = 0
+
+    @staticmethod
+    def key(content_hash: str, text: str, model: str = MODEL) -> str:
+        text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return hashlib.sha256(f"{model}|{PROMPT_VERSION}|{content_hash}|{text_hash}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> dict | None:
+        row = self._db.execute("SELECT value FROM cache WHERE key=?", (key,)).fetchone()
+        return orjson.loads(row[0]) if row else None
+
+    def lookup(self, content_hash: str, text: str) -> dict | None:
+        """
+        Cached analysis of `text` by MODEL, else by SMALL_MODEL (when set). Which model serves an
+        article depends on what it is grouped with, so a hit under either one is reused.
+        """
+        for model in (MODEL, SMALL_MODEL) if SMALL_MODEL else (MODEL,):
+            info = self.get(self.key(content_hash, text, model))
+            if info is not None:
+                return info
+        return None
+
+    def put(self, key: str, value: dict) -> None:
+        self._db.execute(
+            "INSERT OR REPLACE INTO cache (key, value, ts) VALUES (?, ?, ?)",
+            (key, orjson.dumps(value).decode(), int(time.time())),
+        )
+        self._pending += 1
+        if self._pending >= self.COMMIT_EVERY:
+            self._db.commit()
+            self._pending = 0
+
+    def close(self) -> None:
+        self._db.commit()
+        self._db.close()
 
 # --- Helpers -----------------------------------------------------------------
 
 def _latest_jsonl(dirpath: Path) -> Path | None:
-    files = sorted(dirpath.glob("*.jsonl"), reverse=True)
-    return files[0] if files else None
+    """Most recently modified *.jsonl in `dirpath` (one pass, no sort; names needn't encode time)."""
+    return max(dirpath.glob("*.jsonl"), key=lambda p: p.stat().st_mtime, default=None)
 
 def _best_text(enriched: EnrichedItem) -> str:
     """Prefer full content, else description, else title."""
     return (enriched.content or enriched.description or enriched.title or "")
 
+def _apply_info(enriched: EnrichedItem, info: dict) -> None:
+    """Copy an analysis result {summary, topics, sentiment} onto the item."""
+    enriched.summary = info.get("summary")
+    enriched.topics = info.get("topics") or []
+    enriched.sentiment = info.get("sentiment") or "Neutral"
+
+@lru_cache(maxsize=1)
+def _encoding():
+    """tiktoken encoding for MODEL, or None if it can't be loaded (falls back to CHARS_PER_TOKEN)."""
+    try:
+        try:
+            return tiktoken.encoding_for_model(MODEL)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        print(f"[analysis] tiktoken encoding unavailable ({e.__class__.__name__}); "
+              f"estimating {CHARS_PER_TOKEN} chars/token", file=sys.stderr)
+        return None
+
+def _count_tokens(text: str) -> int:
+    enc = _encoding()
+    if enc is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(enc.encode(text, disallowed_special=()))
+
+def _token_windows(text: str, size: int, step: int, limit: int) -> List[str]:
+    """Up to `limit` windows of `size` tokens starting every `step` tokens."""
+    enc = _encoding()
+    if enc is None:
+        seq, decode = text, str
+        size, step = size * CHARS_PER_TOKEN, step * CHARS_PER_TOKEN
+    else:
+        seq, decode = enc.encode(text, disallowed_special=()), enc.decode
+    out: List[str] = []
+    for start in range(0, len(seq), step):
+        out.append(decode(seq[start:start + size]))
+        if start + size >= len(seq) or len(out) >= limit:
+            break
+    return out or [text]
+
+def _truncate_tokens(text: str, limit: int) -> str:
+    """First `limit` tokens of `text`."""
+    return _token_windows(text, limit, limit, 1)[0]
+
+def _prompt_key(title: str, text: str) -> str:
+    """Identity of what the model is asked; articles with equal keys get the same analysis."""
+    return hashlib.sha1(f"{title}\x00{text}".encode("utf-8")).hexdigest()
+
+def _model_for(*texts: str) -> str:
+    """Model for a request over `texts`: SMALL_MODEL if it is set and every text is short, else MODEL."""
+    if SMALL_MODEL and all(_count_tokens(t) < SMALL_MODEL_TOKENS for t in texts):
+        return SMALL_MODEL
+    return MODEL
+
+class _UnitPacker:
+    """
+    Plan request units over per-article token counts, fed one at a time (None = nothing to
+    analyze, skipped). Consecutive short texts are packed up to GROUP_SIZE / GROUP_TOKENS per
+    unit; long texts (chunked path) always get a unit of their own.
+    """
+
+    def __init__(self) -> None:
+        self._next = 0
+        self._group: List[int] = []
+        self._tokens = 0
+
+    def add(self, n: int | None) -> List[List[int]]:
+        """Take the next article's token count; return the units it completes."""
+        i = self._next
+        self._next += 1
+        if n is None:
+            return []
+        if n > SINGLE_SHOT_TOKEN_LIMIT or GROUP_SIZE == 1:
+            return [[i]]
+        units: List[List[int]] = []
+        if self._group and (len(self._group) >= GROUP_SIZE or self._tokens + n > GROUP_TOKENS):
+            units.append(self._group)
+            self._group, self._tokens = [], 0
+        self._group.append(i)
+        self._tokens += n
+        return units
+
+    def close(self) -> List[List[int]]:
+        """The last, partly filled unit (if any)."""
+        group, self._group, self._tokens = self._group, [], 0
+        return [group] if group else []
+
+def _group_units(sizes: Iterable[int | None]) -> Iterator[List[int]]:
+    """_UnitPacker over a stream of token counts: units are yielded as soon as they are complete."""
+    packer = _UnitPacker()
+    for n in sizes:
+        yield from packer.add(n)
+    yield from packer.close()
+
 def _chunk_text(text: str, size: int, overlap: int) -> List[str]:
-    """Simple character-based chunker with overlap."""
+    """Token-based chunker with overlap (at most MAX_CHUNKS chunks)."""
     if size <= 0:
         return [text]
-    if overlap < 0:
-        overlap = 0
-    chunks: List[str] = []
-    start = 0
-    n = len(text)
-    while start < n and len(chunks) < MAX_CHUNKS + 5:  # hard stop to avoid runaway
-        end = min(start + size, n)
-        chunks.append(text[start:end])
-        if end == n:
-            break
-        start = end - overlap if end - overlap > start else end
-    # Respect MAX_CHUNKS cap
-    if len(chunks) > MAX_CHUNKS:
-        chunks = chunks[:MAX_CHUNKS]
-    return chunks
-
-@retry(stop=stop_after_attempt(3), wait=wait_exponential_jitter(1.0, 3.0))
-def _call_llm_json(title: str, article_text: str) -> dict:
-    """Single-shot JSON (short articles)."""
-    chain = SINGLE_PROMPT | llm
-    resp = chain.invoke({"title": title, "article_text": article_text})
-    txt = (resp.content or "").strip()
+    overlap = min(max(overlap, 0), size - 1)
+    return _token_windows(text, size, size - overlap, MAX_CHUNKS)
+
+def _extract_json(text: str, opener: str = "{") -> str | None:
+    """
+    Return the first balanced JSON object (or array with opener="[") in `text`.
+    Single linear scan that ignores brackets inside string literals, so it copes with
+    ```json fences and chatter around the payload without regex backtracking.
+    """
+    closer = "}" if opener == "{" else "]"
+    start = text.find(opener)
+    if start == -1:
+        return None
+    depth = 0
+    in_str = False
+    escaped = False
+    for j in range(start, len(text)):
+        ch = text[j]
+        if in_str:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_str = False
+        elif ch == '"':
+            in_str = True
+        elif ch == opener:
+            depth += 1
+        elif ch == closer:
+            depth -= 1
+            if depth == 0:
+                return text[start:j + 1]
+    return None
+
+def _loads_reply(txt: str, opener: str = "{"):
+    """orjson.loads the reply, or the first balanced JSON payload inside it; None if neither parses."""
     try:
-        return json.loads(txt)
-    except Exception:
-        # If model didn't return JSON, keep something useful
-        return {"summary": txt[:800], "topics": [], "sentiment": "Neutral"}
-
-@retry(stop=stop_after_attempt(3), wait=wait_exponential_jitter(1.0, 3.0))
-def _summarize_chunk(title: str, chunk_text: str) -> str:
+        return orjson.loads(txt)
+    except orjson.JSONDecodeError:
+        pass
+    payload = _extract_json(txt, opener)
+    if payload is None:
+        return None
+    try:
+        return orjson.loads(payload)
+    except orjson.JSONDecodeError:
+        return None
+
+def _parse_json_reply(content: str | None) -> dict:
+    """Parse a free-text JSON reply: {summary, topics[], sentiment} (batch results)."""
+    txt = (content or "").strip()
+    info = _loads_reply(txt)
+    if isinstance(info, dict):
+        return info
+    # If model didn't return JSON, keep something useful
+    return {"summary": txt[:800], "topics": [], "sentiment": "Neutral"}
+
+@_llm_retry
+async def _call_llm_json(title: str, article_text: str, model: str = MODEL) -> dict:
+    """Single-shot JSON (short articles) on `model` (SMALL_MODEL for short enough texts, see _model_for)."""
+    chain = SINGLE_CHAIN if model == MODEL else SINGLE_CHAIN_SMALL
+    payload = await _ainvoke(chain, {"title": title, "article_text": article_text}, model)
+    return payload.model_dump()
+
+@_llm_retry
+async def _summarize_chunk(title: str, chunk_text: str) -> str:
     """Summarize a single chunk into 2–3 sentences (plain text)."""
-    chain = CHUNK_PROMPT | llm
-    resp = chain.invoke({"title": title, "chunk_text": chunk_text})
+    resp = await _ainvoke(CHUNK_CHAIN, {"title": title, "chunk_text": chunk_text})
     return (resp.content or "").strip()
 
-@retry(stop=stop_after_attempt(3), wait=wait_exponential_jitter(1.0, 3.0))
-def _combine_summaries(title: str, chunk_summaries: List[str]) -> dict:
+@_llm_retry
+async def _combine_summaries(title: str, chunk_summaries: List[str]) -> dict:
     """Combine chunk summaries into final JSON: {summary, topics[], sentiment}."""
-    chain = COMBINE_PROMPT | llm
     joined = "\n\n".join(chunk_summaries)
-    resp = chain.invoke({"title": title, "chunk_summaries": joined})
-    txt = (resp.content or "").strip()
-    try:
-        return json.loads(txt)
-    except Exception:
-        return {"summary": txt[:800], "topics": [], "sentiment": "Neutral"}
-
-def _analyze_text(title: str, article_text: str, notify: callable | None = None) -> dict:
-    """Choose single-shot vs chunked summarization."""
-    if len(article_text) <= SINGLE_SHOT_CHAR_LIMIT:
-        return _call_llm_json(title, article_text[:SINGLE_SHOT_CHAR_LIMIT])
+    payload = await _ainvoke(COMBINE_CHAIN, {"title": title, "chunk_summaries": joined})
+    return payload.model_dump()
+
+@_llm_retry
+async def _call_llm_group(n: int, articles_block: str, model: str = MODEL) -> GroupPayload:
+    """One request covering `n` short articles."""
+    chain = GROUP_CHAIN if model == MODEL else GROUP_CHAIN_SMALL
+    return await _ainvoke(chain, {"n": n, "articles": articles_block}, model)
+
+async def _analyze_shortform_group(articles: List[tuple[str, str]]) -> tuple[List[dict], str]:
+    """
+    Analyze several short (title, text) articles in one request; returns the analyses and the model used.
+    Raises ValueError if the reply doesn't hold one analysis per article.
+    """
+    block = "\n\n".join(
+        f"<<<ARTICLE {i} TITLE: {title}\nTEXT: {text}>>>"
+        for i, (title, text) in enumerate(articles, start=1)
+    )
+    model = _model_for(*(text for _, text in articles))
+    payload = await _call_llm_group(len(articles), block, model)
+    if len(payload.items) != len(articles):
+        raise ValueError(f"group reply holds {len(payload.items)} analyses, expected {len(articles)}")
+    return [p.model_dump() for p in payload.items], model
+
+async def _analyze_text(title: str, article_text: str, notify: callable | None = None) -> tuple[dict, str]:
+    """Choose single-shot vs chunked summarization; returns the analysis and the model that produced it."""
+    if _count_tokens(article_text) <= SINGLE_SHOT_TOKEN_LIMIT:
+        model = _model_for(article_text)
+        return await _call_llm_json(title, article_text, model), model
 
     # Chunked path
-    chunks = _chunk_text(article_text, CHUNK_CHARS, CHUNK_OVERLAP)
+    chunks = _chunk_text(article_text, CHUNK_TOKENS, CHUNK_OVERLAP)
     if notify:
         notify(f"[analysis] Long article: chunking into {len(chunks)} parts")
 
+    # Map: all chunk summaries in parallel (bounded by _LLM_SLOTS), then reduce via combine
     mini_summaries: List[str] = []
-    for i, ch in enumerate(chunks, start=1):
-        s = _summarize_chunk(title, ch)
+    for s in await asyncio.gather(*(_summarize_chunk(title, ch) for ch in chunks)):
         # ensure non-empty; keep it short-ish to protect the combine step
         s = (s or "").strip()
         if not s:
@@ -188,103 +532,258 @@ def _analyze_text(title: str, article_text: str, notify: callable | None = None)
 
     if not mini_summaries:
         # Fallback: at least try a truncated single-shot
-        return _call_llm_json(title, article_text[:SINGLE_SHOT_CHAR_LIMIT])
+        return await _call_llm_json(title, _truncate_tokens(article_text, SINGLE_SHOT_TOKEN_LIMIT)), MODEL
 
-    return _combine_summaries(title, mini_summaries)
+    return await _combine_summaries(title, mini_summaries), MODEL
 
 # --- Main --------------------------------------------------------------------
 
+async def _analyze_unit(items: List[EnrichedItem]) -> List[tuple[dict, str]]:
+    """
+    Analyze one unit: a single article (single-shot or chunked) or a group of short ones.
+    Returns (analysis, model that produced it) per item, in order.
+    """
+    # Prefer full content, then description, then title
+    articles = [(it.title, _best_text(it)) for it in items]
+    if len(articles) == 1:
+        title, text = articles[0]
+        # Main logic (single vs chunked)
+        return [await _analyze_text(title=title, article_text=text, notify=lambda msg: tqdm.write(msg))]
+    try:
+        infos, model = await _analyze_shortform_group(articles)
+        return [(info, model) for info in infos]
+    except ValueError as e:
+        tqdm.write(f"[analysis] Group of {len(articles)} fell back to per-item calls ({e})")
+        models = [_model_for(x) for _, x in articles]
+        infos = await asyncio.gather(*(_call_llm_json(t, x, m) for (t, x), m in zip(articles, models)))
+        return list(zip(infos, models))
+
+async def _run(lines: Iterable[bytes] | AsyncIterable[bytes], fout, cache: AnalysisCache | None = None,
+               total_bytes: int | None = None) -> dict:
+    """
+    Stream `lines` through a pipeline and write results to the binary file `fout` in input order:
+    a reader parses lines (from a file, or an async producer such as pipeline.py's fetch) and
+    resolves cache hits / duplicates, packing the rest into units on a bounded queue; CONCURRENCY workers analyze units (LLM requests bounded by _LLM_SLOTS); finished
+    items are written as soon as everything before them is done.
+    Returns counters: succeeded, failed, cached, duplicates, plus `sentiments` / `topics` Counters.
+    """
+    items: list[EnrichedItem | None] = []
+    nbytes: list[int] = []
+    ok: list[bool] = []
+    done: list[bool] = []
+    # Republished stories (same title + text, e.g. from several feeds): one representative
+    # per prompt is analyzed, the rest get its result
+    prompts: list[str | None] = []     # _prompt_key per item
+    pending: dict[str, int] = {}       # prompt key -> in-flight representative
+    resolved: dict[str, dict] = {}     # prompt key -> info of a finished representative
+    copies: dict[int, list[int]] = {}  # representative -> later items with the same hash
+
+    succeeded = failed = cached = duplicates = 0
+    next_write = 0
+    written = 0
+    last_report = time.time()
+    last_bucket = 0
+    sentiments: Counter[str] = Counter()
+    topics: Counter[str] = Counter()
+    pbar = tqdm(total=total_bytes, desc="Analyzing", unit="B", unit_scale=True, unit_divisor=1024)
+
+    def flush() -> None:
+        """Write the finished prefix so the output keeps input order."""
+        nonlocal next_write, written
+        while next_write < len(done) and done[next_write]:
+            if ok[next_write]:
+                item = items[next_write]
+                # Fields were validated on input and _apply_info only sets plain values,
+                # so serialize the instance dict directly (no model_dump pass per item)
+                fout.write(orjson.dumps(vars(item)))
+                fout.write(b"\n")
+                sentiments[item.sentiment] += 1
+                topics.update(item.topics)
+                written += 1
+                # Bound what a crash can lose without a syscall per item
+                if FSYNC_EVERY > 0 and written % FSYNC_EVERY == 0:
+                    fout.flush()
+                    os.fsync(fout.fileno())
+            items[next_write] = None
+            next_write += 1
+
+    def finish(members: List[int]) -> None:
+        nonlocal last_report, last_bucket
+        for j in members:
+            done[j] = True
+        flush()
+        pbar.update(sum(nbytes[j] for j in members))
+
+        # periodic lightweight status
+        processed = succeeded + failed
+        if processed // LOG_EVERY > last_bucket:
+            now = time.time()
+            elapsed = now - last_report
+            rate = (processed - last_bucket * LOG_EVERY) / elapsed if elapsed > 0 else 0.0
+            tqdm.write(f"[analysis] {processed} processed | ok={succeeded} fail={failed} | ~{rate:.1f} it/s")
+            last_report = now
+            last_bucket = processed // LOG_EVERY
+
+    def size(line: bytes) -> int | None:
+        """Parse the next line; return its token count, or None if it needs no LLM call."""
+        nonlocal succeeded, failed, cached, duplicates
+        i = len(items)
+        nbytes.append(len(line))
+        prompts.append(None)
+        ok.append(False)
+        done.append(False)
+        try:
+            enriched = EnrichedItem(**orjson.loads(line))
+        except Exception as e:
+            items.append(None)
+            tqdm.write(f"[analysis] Line {i + 1}: parse error ({e.__class__.__name__})")
+            failed += 1
+            finish([i])
+            return None
+        items.append(enriched)
+        text = _best_text(enriched)
+        h = prompts[i] = _prompt_key(enriched.title, text)
+
+        # Cache hits are final right away; only misses reach the LLM
+        info = None
+        if cache is not None:
+            info = cache.lookup(enriched.content_hash, text)
+            if info is not None:
+                cached += 1
+        if info is None and h in resolved:
+            info = resolved[h]
+            duplicates += 1
+        if info is not None:
+            _apply_info(enriched, info)
+            ok[i] = True
+            succeeded += 1
+            finish([i])
+            return None
+        if h in pending:
+            copies.setdefault(pending[h], []).append(i)
+            duplicates += 1
+            return None
+        pending[h] = i
+        return _count_tokens(text)
+
+    async def one(unit: List[int]) -> None:
+        nonlocal succeeded, failed
+        try:
+            results = list(zip(unit, await _analyze_unit([items[i] for i in unit])))
+        except Exception as e:
+            results = [(i, None) for i in unit]
+            tqdm.write(f"[analysis] Item failed ({e.__class__.__name__}: {e})")
+        # Duplicates may have queued up behind a representative while it was in flight
+        members: List[int] = []
+        for i, result in results:
+            pending.pop(prompts[i], None)
+            same = [i, *copies.pop(i, ())]
+            members += same
+            if result is None:
+                failed += len(same)
+                continue
+            info, model = result
+            resolved[prompts[i]] = info
+            for j in same:
+                _apply_info(items[j], info)
+                ok[j] = True
+                if cache is not None:
+                    # Keyed by the model that actually answered (a group may not match the item alone)
+                    cache.put(cache.key(items[j].content_hash, _best_text(items[j]), model), info)
+            succeeded += len(same)
+        finish(members)
+
+    queue: asyncio.Queue[List[int] | None] = asyncio.Queue(maxsize=2 * CONCURRENCY)
+
+    async def reader() -> None:
+        packer = _UnitPacker()
+        if isinstance(lines, AsyncIterable):
+            async for line in lines:
+                for unit in packer.add(size(line)):
+                    await queue.put(unit)
+        else:
+            for line in lines:
+                for unit in packer.add(size(line)):
+                    await queue.put(unit)
+        for unit in packer.close():
+            await queue.put(unit)
+        for _ in range(CONCURRENCY):
+            await queue.put(None)
+
+    async def worker() -> None:
+        while (unit := await queue.get()) is not None:
+            await one(unit)
+
+    await asyncio.gather(reader(), *(worker() for _ in range(CONCURRENCY)))
+    flush()
+    pbar.close()
+    return {"succeeded": succeeded, "failed": failed, "cached": cached, "duplicates": duplicates,
+            "sentiments": sentiments, "topics": topics}
+
+async def _analyze_file(lines: Iterable[bytes], fout, cache: AnalysisCache | None,
+                        total_bytes: int | None = None) -> dict:
+    """_run() plus closing the shared HTTP client, which is bound to this event loop."""
+    try:
+        return await _run(lines, fout, cache, total_bytes)
+    finally:
+        await _HTTP_CLIENT.aclose()
+
 def main() -> None:
     in_file = _latest_jsonl(INPUT_DIR)
     if not in_file:
         print(f"[analysis] No input files in {INPUT_DIR}/", file=sys.stderr)
         sys.exit(2)
 
+    OUT_DIR.mkdir(parents=True, exist_ok=True)
     out_file = OUT_DIR / in_file.name.replace("news_", "analysis_")
 
-    # Count lines first for a proper progress bar
-    with in_file.open("r", encoding="utf-8") as f:
-        total = sum(1 for _ in f)
-
-    if MAX_ITEMS > 0:
-        total = min(total, MAX_ITEMS)
+    # No separate line-count pass: _run streams the file once; progress is tracked in input bytes
+    in_bytes = in_file.stat().st_size
 
     start_ts = time.time()
     print("=" * 72)
     print(f"[analysis] Starting (token-safe mode)")
     print(f"  Model:                     {MODEL}")
+    print(f"  Small model:               {f'{SMALL_MODEL} (< {SMALL_MODEL_TOKENS} tokens)' if SMALL_MODEL else 'off'}")
     print(f"  Input:                     {in_file}")
     print(f"  Output:                    {out_file}")
-    print(f"  Items:                     {total} {'(limited)' if MAX_ITEMS > 0 else ''}")
-    print(f"  SINGLE_SHOT_CHAR_LIMIT:    {SINGLE_SHOT_CHAR_LIMIT}")
-    print(f"  CHUNK_CHARS / OVERLAP:     {CHUNK_CHARS} / {CHUNK_OVERLAP}")
+    print(f"  Input size:                {in_bytes / 1e6:.1f} MB {f'(first {MAX_ITEMS} items)' if MAX_ITEMS > 0 else ''}")
+    print(f"  CONCURRENCY:               {CONCURRENCY}")
+    print(f"  Rate limit (RPM / TPM):    {OPENAI_RPM or '-'} / {OPENAI_TPM or '-'}")
+    print(f"  Cache:                     {CACHE_PATH if USE_CACHE else 'off'}")
+    print(f"  SINGLE_SHOT_TOKEN_LIMIT:   {SINGLE_SHOT_TOKEN_LIMIT}")
+    print(f"  CHUNK_TOKENS / OVERLAP:    {CHUNK_TOKENS} / {CHUNK_OVERLAP}")
     print(f"  MAX_CHUNKS:                {MAX_CHUNKS}")
+    print(f"  GROUP_SIZE / GROUP_TOKENS: {GROUP_SIZE} / {GROUP_TOKENS}")
     print("=" * 72, flush=True)
 
-    processed = 0
-    succeeded = 0
-    failed = 0
-    last_report = start_ts
-
-    with in_file.open("r", encoding="utf-8") as fin, out_file.open("w", encoding="utf-8") as fout:
-        pbar = tqdm(total=total, desc="Analyzing", unit="item")
-        for i, line in enumerate(fin, start=1):
-            if MAX_ITEMS > 0 and processed >= MAX_ITEMS:
-                break
-
-            try:
-                raw = json.loads(line)
-            except Exception as e:
-                failed += 1
-                processed += 1
-                pbar.update(1)
-                if processed % LOG_EVERY == 0:
-                    elapsed = time.time() - last_report
-                    rate = LOG_EVERY / elapsed if elapsed > 0 else 0.0
-                    tqdm.write(f"[analysis] {processed}/{total}: parse error ({e.__class__.__name__}); ~{rate:.1f} it/s")
-                    last_report = time.time()
-                continue
-
-            try:
-                enriched = EnrichedItem(**raw)
-                # Prefer full content, then description, then title
-                article_text = _best_text(enriched)
-                # Main logic (single vs chunked)
-                info = _analyze_text(
-                    title=enriched.title,
-                    article_text=article_text,
-                    notify=lambda msg: tqdm.write(msg)
-                )
-                enriched.summary = info.get("summary")
-                enriched.topics = info.get("topics") or []
-                enriched.sentiment = info.get("sentiment") or "Neutral"
-                fout.write(enriched.model_dump_json() + "\n")
-                succeeded += 1
-            except Exception as e:
-                failed += 1
-                tqdm.write(f"[analysis] Item failed ({e.__class__.__name__}: {e})")
-
-            processed += 1
-            pbar.update(1)
-
-            # periodic lightweight status
-            if processed % LOG_EVERY == 0:
-                now = time.time()
-                elapsed = now - last_report
-                rate = LOG_EVERY / elapsed if elapsed > 0 else 0.0
-                tqdm.write(f"[analysis] {processed}/{total} processed | ok={succeeded} fail={failed} | ~{rate:.1f} it/s")
-                last_report = now
-
-        pbar.close()
+    cache = AnalysisCache(CACHE_PATH) if USE_CACHE else None
+    try:
+        with in_file.open("rb", buffering=IO_BUFFER) as fin, out_file.open("wb", buffering=IO_BUFFER) as fout:
+            lines = islice(fin, MAX_ITEMS) if MAX_ITEMS > 0 else fin
+            counts = asyncio.run(_analyze_file(lines, fout, cache, None if MAX_ITEMS > 0 else in_bytes))
+    finally:
+        if cache is not None:
+            cache.close()
+    succeeded, failed = counts["succeeded"], counts["failed"]
+    processed = succeeded + failed
 
     wall = time.time() - start_ts
     print("-" * 72)
     print(f"[analysis] Done")
     print(f"  Output file:  {out_file}")
-    print(f"  Processed:    {processed}/{total}")
+    print(f"  Processed:    {processed}")
     print(f"  Succeeded:    {succeeded}")
+    print(f"  From cache:   {counts['cached']}")
+    print(f"  Duplicates:   {counts['duplicates']} (same title + text, analyzed once)")
     print(f"  Failed:       {failed}")
     print(f"  Elapsed:      {wall:.1f}s  (~{processed / wall if wall > 0 else 0:.2f} it/s)")
+    if _REQUESTS:
+        print("  Requests:     " + "  ".join(f"{k}={v}" for k, v in _REQUESTS.most_common()))
+    if counts["sentiments"]:
+        print("  Sentiment:    " + "  ".join(f"{k}={v}" for k, v in counts["sentiments"].most_common()))
+    if counts["topics"]:
+        print("  Top topics:   " + ", ".join(f"{k} ({v})" for k, v in counts["topics"].most_common(10)))
     print("-" * 72, flush=True)
 
 if __name__ == "__main__":
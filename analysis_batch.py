@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+analysis_batch.py
+Stage 2 (offline variant): same enrichment as analysis.py, run through the OpenAI Batch API.
+
+Why:
+- Bulk analysis has no user waiting on individual responses, so the Batch API fits:
+  ~50% cheaper per token and a separate (much higher) rate-limit pool.
+- Trade-off: results arrive within the completion window (up to 24h).
+
+How:
+- Round 1: one batch line per short article (single-shot prompt) and one per chunk of a long article.
+  Short articles use ANALYSIS_SMALL_MODEL when it is set, as in analysis.py.
+- Round 2: one combine line per long article, built from its round-1 chunk summaries.
+- Results are joined back by `custom_id` and written to analysis_results/ exactly like analysis.py.
+- Articles with the same title + text are sent once; duplicates reuse that reply.
+- Articles already in analysis.py's result cache (ANALYSIS_CACHE) are not sent again, and batch
+  results are added to it, so both scripts share one cache.
+- Submitted batch ids are saved in analysis_results/batches/<input>_state.json, so a rerun resumes
+  the pending batch instead of submitting (and paying for) it again.
+
+Usage:
+  python analysis_batch.py             # submit (or resume), wait for results, write output
+  python analysis_batch.py --no-wait   # submit the next round (or report status) and exit;
+                                       # rerun later to collect and continue
+
+Environment toggles (in addition to the analysis.py ones):
+  ANALYSIS_BATCH_POLL=30          # seconds between batch status polls
+"""
+
+from __future__ import annotations
+import os
+import sys
+import time
+from pathlib import Path
+from typing import NoReturn
+
+import orjson
+from langchain_core.utils.function_calling import convert_to_openai_function
+from openai import OpenAI
+from pydantic import ValidationError
+
+from analysis import (
+    CACHE_PATH,
+    CHUNK_OVERLAP,
+    CHUNK_PROMPT,
+    CHUNK_TOKENS,
+    COMBINE_PROMPT,
+    INPUT_DIR,
+    IO_BUFFER,
+    MAX_ITEMS,
+    MODEL,
+    OUT_DIR,
+    SINGLE_PROMPT,
+    SINGLE_SHOT_TOKEN_LIMIT,
+    USE_CACHE,
+    AnalysisCache,
+    EnrichedItem,
+    SummaryPayload,
+    _apply_info,
+    _best_text,
+    _chunk_text,
+    _count_tokens,
+    _latest_jsonl,
+    _loads_reply,
+    _model_for,
+    _parse_json_reply,
+    _prompt_key,
+    _truncate_tokens,
+)
+
+POLL_SECONDS = float(os.getenv("ANALYSIS_BATCH_POLL", "30"))
+# Request files live in a subfolder so vector_db.py never mistakes them for results
+BATCH_DIR = OUT_DIR / "batches"
+ENDPOINT = "/v1/chat/completions"
+
+_ROLES = {"system": "system", "human": "user", "ai": "assistant"}
+
+# Same strict JSON schema analysis.py enforces via with_structured_output
+_SCHEMA = convert_to_openai_function(SummaryPayload, strict=True)
+RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {"name": _SCHEMA["name"], "schema": _SCHEMA["parameters"], "strict": True},
+}
+
+# --- Helpers -----------------------------------------------------------------
+
+class BatchEndedError(RuntimeError):
+    """A batch reached a terminal status other than `completed` (failed / expired / cancelled)."""
+
+def log(msg: str) -> None:
+    print(f"[analysis_batch] {msg}", flush=True)
+
+def _batch_line(custom_id: str, prompt, structured: bool = True, model: str = MODEL, **inputs) -> dict:
+    """One Batch API request line for `prompt` formatted with `inputs` (JSON-schema output if `structured`)."""
+    messages = [
+        {"role": _ROLES.get(m.type, m.type), "content": m.content}
+        for m in prompt.format_messages(**inputs)
+    ]
+    body = {"model": model, "temperature": 0.2, "messages": messages}
+    if structured:
+        body["response_format"] = RESPONSE_FORMAT
+    return {"custom_id": custom_id, "method": "POST", "url": ENDPOINT, "body": body}
+
+def _schema_info(reply: str) -> dict | None:
+    """The reply as {summary, topics, sentiment} if it is JSON matching SummaryPayload, else None."""
+    try:
+        return SummaryPayload.model_validate(_loads_reply(reply.strip())).model_dump()
+    except ValidationError:
+        return None
+
+def _submit_batch(client: OpenAI, lines: list[dict], path: Path) -> str:
+    """Write `lines` to `path`, upload it and create a batch; returns the batch id."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("wb", buffering=IO_BUFFER) as f:
+        for line in lines:
+            f.write(orjson.dumps(line))
+            f.write(b"\n")
+
+    with path.open("rb") as f:
+        uploaded = client.files.create(file=f, purpose="batch")
+    batch = client.batches.create(
+        input_file_id=uploaded.id,
+        endpoint=ENDPOINT,
+        completion_window="24h",
+    )
+    log(f"Submitted batch {batch.id} ({len(lines)} requests, input={path.name})")
+    return batch.id
+
+def _collect_batch(client: OpenAI, batch_id: str, expected: int, wait: bool) -> dict[str, str] | None:
+    """
+    Return {custom_id: reply text} once `batch_id` has completed.
+    With wait=False an unfinished batch only gets a status line and None is returned.
+    """
+    batch = client.batches.retrieve(batch_id)
+    while batch.status not in {"completed", "failed", "expired", "cancelled"}:
+        counts = batch.request_counts
+        done = f"{counts.completed}/{counts.total}" if counts else "?"
+        log(f"Batch {batch.id}: {batch.status} ({done})")
+        if not wait:
+            return None
+        time.sleep(POLL_SECONDS)
+        batch = client.batches.retrieve(batch_id)
+
+    if batch.status != "completed":
+        raise BatchEndedError(f"Batch {batch.id} ended with status {batch.status!r}")
+
+    replies: dict[str, str] = {}
+    if batch.output_file_id:
+        for raw in client.files.content(batch.output_file_id).text.splitlines():
+            if not raw.strip():
+                continue
+            rec = orjson.loads(raw)
+            resp = rec.get("response") or {}
+            if resp.get("status_code") != 200:
+                continue
+            choices = (resp.get("body") or {}).get("choices") or []
+            if choices:
+                replies[rec["custom_id"]] = (choices[0]["message"].get("content") or "").strip()
+    failed = expected - len(replies)
+    if failed:
+        log(f"Batch {batch.id}: {failed} request(s) without a usable reply")
+    return replies
+
+def _run_round(client: OpenAI, state: dict, state_file: Path, name: str,
+               lines: list[dict], path: Path, wait: bool) -> dict[str, str] | None:
+    """
+    Submit round `name` unless the state file already has its batch id, then collect it.
+    A batch that ended without completing is dropped from the state file, so a rerun resubmits it
+    instead of resuming the dead batch forever.
+    """
+    if name not in state:
+        state[name] = _submit_batch(client, lines, path)
+        state_file.write_bytes(orjson.dumps(state))
+    else:
+        log(f"Resuming {name} batch {state[name]}")
+    try:
+        return _collect_batch(client, state[name], len(lines), wait)
+    except BatchEndedError as e:
+        del state[name]
+        if state:
+            state_file.write_bytes(orjson.dumps(state))
+        else:
+            state_file.unlink(missing_ok=True)
+        log(f"{e}; removed it from {state_file.name}")
+        raise
+
+# --- Main --------------------------------------------------------------------
+
+def _batch_ended(cache: AnalysisCache | None, name: str) -> NoReturn:
+    """A batch expired or failed (already dropped from the state file): close up and exit."""
+    if cache is not None:
+        cache.close()
+    log(f"{name.capitalize()} batch did not complete; rerun to resubmit it")
+    sys.exit(1)
+
+def main() -> None:
+    in_file = _latest_jsonl(INPUT_DIR)
+    if not in_file:
+        print(f"[analysis_batch] No input files in {INPUT_DIR}/", file=sys.stderr)
+        sys.exit(2)
+
+    out_file = OUT_DIR / in_file.name.replace("news_", "analysis_")
+    stem = in_file.stem
+    wait = "--no-wait" not in sys.argv[1:]
+    state_file = BATCH_DIR / f"{stem}_state.json"
+    state = orjson.loads(state_file.read_bytes()) if state_file.exists() else {}
+    BATCH_DIR.mkdir(parents=True, exist_ok=True)
+
+    items: list[EnrichedItem] = []
+    texts: list[str] = []
+    with in_file.open("rb", buffering=IO_BUFFER) as fin:
+        for i, line in enumerate(fin, start=1):
+            if MAX_ITEMS > 0 and len(items) >= MAX_ITEMS:
+                break
+            try:
+                item = EnrichedItem(**orjson.loads(line))
+            except Exception as e:
+                log(f"Line {i}: skipped ({e.__class__.__name__})")
+                continue
+            items.append(item)
+            texts.append(_best_text(item))
+
+    print("=" * 72)
+    print(f"[analysis_batch] Starting (OpenAI Batch API)")
+    print(f"  Model:                     {MODEL}")
+    print(f"  Input:                     {in_file}")
+    print(f"  Output:                    {out_file}")
+    print(f"  Items:                     {len(items)} {'(limited)' if MAX_ITEMS > 0 else ''}")
+    print(f"  Cache:                     {CACHE_PATH if USE_CACHE else 'off'}")
+    print("=" * 72, flush=True)
+
+    # Cache hits never reach the batch
+    cache = AnalysisCache(CACHE_PATH) if USE_CACHE else None
+    infos: dict[int, dict] = {}
+    if cache is not None:
+        for idx, (item, text) in enumerate(zip(items, texts)):
+            info = cache.lookup(item.content_hash, text)
+            if info is not None:
+                infos[idx] = info
+        log(f"{len(infos)}/{len(items)} item(s) answered from cache")
+
+    client = OpenAI()
+
+    # Round 1: single-shot for short articles, one line per chunk for long ones
+    round1: list[dict] = []
+    chunk_counts: dict[int, int] = {}
+    first: dict[str, int] = {}
+    same_as: dict[int, int] = {}  # duplicate idx -> idx whose reply it reuses
+    models: dict[int, str] = {}   # idx -> model its final request was sent to (MODEL if absent)
+    for idx, (item, text) in enumerate(zip(items, texts)):
+        if idx in infos:
+            continue
+        rep = first.setdefault(_prompt_key(item.title, text), idx)
+        if rep != idx:
+            same_as[idx] = rep
+            continue
+        if _count_tokens(text) <= SINGLE_SHOT_TOKEN_LIMIT:
+            models[idx] = _model_for(text)
+            round1.append(_batch_line(f"{idx}-single", SINGLE_PROMPT, model=models[idx],
+                                      title=item.title, article_text=text))
+            continue
+        chunks = _chunk_text(text, CHUNK_TOKENS, CHUNK_OVERLAP)
+        chunk_counts[idx] = len(chunks)
+        for k, ch in enumerate(chunks):
+            round1.append(_batch_line(f"{idx}-chunk-{k}", CHUNK_PROMPT, structured=False, title=item.title, chunk_text=ch))
+
+    replies: dict[str, str] | None = {}
+    if round1:
+        try:
+            replies = _run_round(client, state, state_file, "round1", round1, BATCH_DIR / f"{stem}_round1.jsonl", wait)
+        except BatchEndedError:
+            _batch_ended(cache, "round 1")
+        if replies is None:
+            log(f"Round 1 pending; rerun to continue (state: {state_file})")
+            if cache is not None:
+                cache.close()
+            return
+
+    # Round 2: combine chunk summaries (or fall back to a truncated single-shot)
+    round2: list[dict] = []
+    for idx, n in chunk_counts.items():
+        title = items[idx].title
+        minis = [replies.get(f"{idx}-chunk-{k}", "")[:1200] for k in range(n)]
+        minis = [m for m in minis if m]
+        if minis:
+            round2.append(_batch_line(f"{idx}-combine", COMBINE_PROMPT,
+                                      title=title, chunk_summaries="\n\n".join(minis)))
+        else:
+            round2.append(_batch_line(f"{idx}-single", SINGLE_PROMPT,
+                                      title=title, article_text=_truncate_tokens(texts[idx], SINGLE_SHOT_TOKEN_LIMIT)))
+    if round2:
+        try:
+            more = _run_round(client, state, state_file, "round2", round2, BATCH_DIR / f"{stem}_round2.jsonl", wait)
+        except BatchEndedError:
+            _batch_ended(cache, "round 2")
+        if more is None:
+            log(f"Round 2 pending; rerun to continue (state: {state_file})")
+            if cache is not None:
+                cache.close()
+            return
+        replies.update(more)
+
+    succeeded = 0
+    with out_file.open("wb", buffering=IO_BUFFER) as fout:
+        for idx, item in enumerate(items):
+            info = infos.get(idx)
+            if info is None:
+                src = same_as.get(idx, idx)
+                reply = replies.get(f"{src}-combine", replies.get(f"{src}-single"))
+                if reply is None:
+                    continue
+                info = _schema_info(reply)
+                if info is None:
+                    # Malformed reply: keep its text in the output, but don't cache it, so the
+                    # next run (either script) asks again
+                    info = _parse_json_reply(reply)
+                elif cache is not None:
+                    cache.put(cache.key(item.content_hash, texts[idx], models.get(src, MODEL)), info)
+            _apply_info(item, info)
+            fout.write(orjson.dumps(vars(item)))
+            fout.write(b"\n")
+            succeeded += 1
+    if cache is not None:
+        cache.close()
+    state_file.unlink(missing_ok=True)
+
+    print("-" * 72)
+    print(f"[analysis_batch] Done")
+    print(f"  Output file:  {out_file}")
+    print(f"  Succeeded:    {succeeded}/{len(items)}")
+    print(f"  From cache:   {len(infos)}")
+    print(f"  Duplicates:   {len(same_as)} (same title + text, sent once)")
+    print("-" * 72, flush=True)
+
+if __name__ == "__main__":
+    main()
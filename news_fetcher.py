@@ -4,9 +4,14 @@ news_fetcher.py
 Stage 1: Fetch, normalize, and (optionally) fetch full article text into news_data/ as JSONL.
 
 Highlights:
-- Robust RSS parsing with `feedparser`.
-- If full text not in feed, fetch page HTML and extract with `trafilatura`.
-- Async httpx with retries, concurrency limits, proxy support (trust_env=True).
+- Plain RSS 2.0 / Atom feeds are parsed with lxml (fast, C); anything else falls back to `feedparser`.
+- If full text not in feed, fetch page HTML and extract it with `resiliparse` (fast) and/or
+  `trafilatura` (EXTRACTOR).
+- Async httpx (HTTP/2 + pooled keep-alive connections, gzip/brotli bodies) with retries, concurrency limits,
+  proxy support (trust_env=True).
+- Runs on uvloop when installed (faster scheduling/socket I/O), else the default asyncio loop.
+- Feeds are fetched concurrently (politeness is per host, not across sources).
+- Article pages start downloading as soon as their feed is parsed, while other feeds are in flight.
 - FEED_URLS in .env (Name|URL[,rss|json]) with ; or newline separators.
 - Prints per-source stats:
     • average text length (chars & words)
@@ -15,31 +20,60 @@ Highlights:
 Env controls (examples):
   CONTENT_FETCH=true
   CONTENT_CONCURRENCY=5
+  CONTENT_PER_HOST=3                # article pages downloaded concurrently from one host
   CONTENT_TIMEOUT=20
+  CONTENT_MAX_BYTES=2097152         # article page download cap, longer pages are cut off (0 = none)
+  CONTENT_REUSE=3                   # reuse full text from the last N news_*.jsonl files (0 = off)
+  EXTRACT_WORKERS=<cpu count>       # processes for page text extraction, at most CONTENT_CONCURRENCY (0 = threads)
+  EXTRACTOR=hybrid                  # resiliparse | trafilatura | hybrid (resiliparse, trafilatura fallback)
   MAX_ARTICLES_PER_SOURCE=50
-  REQUEST_DELAY=0.3
+  REQUEST_DELAY=0.3                 # spacing between feed requests to the same host
+  FEED_PER_HOST=2                   # feeds fetched concurrently from one host
+  FEED_CONCURRENCY=8                # feeds fetched concurrently in total
+  FEED_CACHE=true                   # conditional GETs: unchanged feeds come back as 304s
   FEED_URLS="BBC-World|https://feeds.bbci.co.uk/news/world/rss.xml,rss;AP-Top|https://www.apnews.com/apf-topnews?output=atom,rss"
 """
 
 from __future__ import annotations
 import asyncio
 import hashlib
-import json
+import multiprocessing
 import os
+import random
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import nullcontext
+from functools import lru_cache
 from dataclasses import dataclass
 from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from itertools import islice
 from pathlib import Path
 from typing import Any, Iterable, List, Optional
+from urllib.parse import urlsplit, urlunsplit
 import re
-import socket
 import sys
 
 import httpx
 import feedparser
-from tenacity import retry, stop_after_attempt, wait_exponential_jitter, retry_if_exception_type
+import orjson
+from tenacity import retry, stop_after_attempt, wait_exponential_jitter, retry_if_exception
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
-import trafilatura
+import lxml.html
+from lxml import etree
+
+try:  # optional faster event loop (libuv); not available on Windows
+    import uvloop
+except ImportError:
+    uvloop = None
+
+try:  # optional fast main-text extractor; trafilatura is used without it
+    from resiliparse.extract.html2text import extract_plain_text
+    from resiliparse.parse.encoding import detect_encoding
+    from resiliparse.parse.html import HTMLTree
+except ImportError:
+    HTMLTree = None
 
 # pretty stats table
 from rich.table import Table
@@ -49,15 +83,28 @@ from rich import box
 console = Console()
 load_dotenv()
 
-DATA_DIR = Path(os.getenv("OUTPUT_DIR", "news_data"))
-DATA_DIR.mkdir(parents=True, exist_ok=True)
+DATA_DIR = Path(os.getenv("OUTPUT_DIR", "news_data"))  # created on first write
 
 REQUEST_DELAY = float(os.getenv("REQUEST_DELAY", "0.3"))
+FEED_PER_HOST = max(1, int(os.getenv("FEED_PER_HOST", "2")))
+FEED_CONCURRENCY = max(1, int(os.getenv("FEED_CONCURRENCY", "8")))
+# Conditional GETs (ETag / Last-Modified) for feeds, validators + last body kept in DATA_DIR/.feed_cache/
+FEED_CACHE = os.getenv("FEED_CACHE", "true").lower() in {"1", "true", "yes", "on"}
 MAX_ARTICLES_PER_SOURCE = int(os.getenv("MAX_ARTICLES_PER_SOURCE", "50"))
 
 CONTENT_FETCH = os.getenv("CONTENT_FETCH", "true").lower() in {"1", "true", "yes", "on"}
 CONTENT_CONCURRENCY = int(os.getenv("CONTENT_CONCURRENCY", "5"))
+CONTENT_PER_HOST = max(1, int(os.getenv("CONTENT_PER_HOST", "3")))
 CONTENT_TIMEOUT = float(os.getenv("CONTENT_TIMEOUT", "20"))
+# Article pages are read up to this many bytes (main text sits well within it); 0 = no cap
+CONTENT_MAX_BYTES = max(0, int(os.getenv("CONTENT_MAX_BYTES", str(2 << 20))))
+# Previous output files whose extracted full text is reused for articles seen again (0 = always download)
+CONTENT_REUSE = max(0, int(os.getenv("CONTENT_REUSE", "3")))
+# Processes for main-text extraction (0 = threads in this process); no more than there are
+# concurrent downloads to feed them
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", str(min(os.cpu_count() or 1, CONTENT_CONCURRENCY))))
+# resiliparse | trafilatura | hybrid (resiliparse, trafilatura when it finds too little)
+EXTRACTOR = os.getenv("EXTRACTOR", "hybrid").lower()
 
 UA = os.getenv("USER_AGENT", "news-fetcher/1.0 (+https://example.local)")
 
@@ -82,18 +129,23 @@ def log(msg: str) -> None:
     ts = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S%z")
     print(f"[news_fetcher {ts}] {msg}", flush=True)
 
+def run_async(coro):
+    """asyncio.run(), on uvloop when it is installed."""
+    if uvloop is None:
+        return asyncio.run(coro)
+    with asyncio.Runner(loop_factory=uvloop.new_event_loop) as runner:
+        return runner.run(coro)
+
 def canonicalize_url(url: str) -> str:
-    if "?" in url:
-        url, _ = url.split("?", 1)
-    url = re.sub(r"/+$", "", url.strip())
-    url = url.replace("http://", "https://")
-    return url
+    """https, lower-case host, no query/fragment, no trailing slashes (one urlsplit, no regex)."""
+    p = urlsplit(url.strip())
+    scheme = "https" if p.scheme in ("http", "https") else p.scheme
+    return urlunsplit((scheme, p.netloc.lower(), p.path.rstrip("/"), "", ""))
 
 def sha256(*parts: str) -> str:
-    h = hashlib.sha256()
-    for p in parts:
-        h.update(p.encode("utf-8"))
-    return h.hexdigest()
+    # One encode + one C-level hash call; same digest as updating with each part in turn,
+    # so existing ids / content_hash values (and caches keyed on them) stay valid
+    return hashlib.sha256("".join(parts).encode("utf-8")).hexdigest()
 
 def _text_for_metrics(a: Article) -> str:
     """Pick the best available text for metrics (content > description > title)."""
@@ -108,30 +160,34 @@ def compute_stats(articles: list[Article]) -> dict[str, dict[str, float]]:
       avg_chars, avg_words, max_chars, max_words, count
     Returns: { source: {metric: value, ...}, ... }
     """
-    per: dict[str, list[tuple[int, int]]] = {}
+    # One pass with running aggregates per source: [count, sum_chars, sum_words, max_chars, max_words]
+    per: dict[str, list[int]] = {}
     for a in articles:
         t = _text_for_metrics(a)
         chars = len(t)
         words = _word_count(t)
-        per.setdefault(a.source, []).append((chars, words))
-
-    stats: dict[str, dict[str, float]] = {}
-    for src, pairs in per.items():
-        if not pairs:
+        agg = per.get(a.source)
+        if agg is None:
+            per[a.source] = [1, chars, words, chars, words]
             continue
-        counts = len(pairs)
-        sum_chars = sum(c for c, _ in pairs)
-        sum_words = sum(w for _, w in pairs)
-        max_chars = max(c for c, _ in pairs)
-        max_words = max(w for _, w in pairs)
-        stats[src] = {
-            "count": counts,
-            "avg_chars": round(sum_chars / counts, 2),
-            "avg_words": round(sum_words / counts, 2),
+        agg[0] += 1
+        agg[1] += chars
+        agg[2] += words
+        if chars > agg[3]:
+            agg[3] = chars
+        if words > agg[4]:
+            agg[4] = words
+
+    return {
+        src: {
+            "count": count,
+            "avg_chars": round(sum_chars / count, 2),
+            "avg_words": round(sum_words / count, 2),
             "max_chars": max_chars,
             "max_words": max_words,
         }
-    return stats
+        for src, (count, sum_chars, sum_words, max_chars, max_words) in per.items()
+    }
 
 def print_stats_table(stats: dict[str, dict[str, float]]) -> None:
     if not stats:
@@ -170,7 +226,25 @@ def _default_sources() -> list[Source]:
         Source(name="AP-Top", url="https://www.apnews.com/apf-topnews?output=atom", kind="rss"),
     ]
 
-ENTRY_SPLIT_RE = re.compile(r"[;\n]|,(?=(?:[^\"']|\"[^\"]*\"|'[^']*')*$)")
+def _split_entries(raw: str) -> list[str]:
+    """
+    Split FEED_URLS on ";" / newlines, and on commas outside quotes, in one linear pass
+    (a lookahead regex re-scans the rest of the string at every comma).
+    """
+    parts: list[str] = []
+    start, quote = 0, ""
+    for i, ch in enumerate(raw):
+        if quote:
+            if ch == quote:
+                quote = ""
+        elif ch in "\"'":
+            quote = ch
+        if ch in ";\n" or (ch == "," and not quote):
+            parts.append(raw[start:i])
+            start = i + 1
+    parts.append(raw[start:])
+    return parts
+
 ENTRY_RE = re.compile(
     r"""
     ^\s*
@@ -190,7 +264,7 @@ def _sources_from_env() -> list[Source]:
     raw = os.getenv("FEED_URLS", "").strip()
     if not raw:
         return []
-    entries = [e for e in ENTRY_SPLIT_RE.split(raw) if e and e.strip() and "|" in e]
+    entries = [e for e in _split_entries(raw) if e and e.strip() and "|" in e]
     out: list[Source] = []
     for e in entries:
         token = e.strip().strip('"\'')
@@ -216,19 +290,120 @@ SOURCES: list[Source] = _sources_from_env() or _default_sources()
 
 # ---- HTTP helpers ------------------------------------------------------------
 
+def _is_transient(exc: BaseException) -> bool:
+    """Worth retrying: network/timeout errors, 429 and 5xx. Other 4xx and parse bugs fail fast."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code == 429 or exc.response.status_code >= 500
+    return isinstance(exc, httpx.TransportError)
+
+_backoff = wait_exponential_jitter(0.5, 2.0)
+
+def _retry_wait(state) -> float:
+    """The server's Retry-After (seconds or HTTP date, capped at 30s) when given, else jittered backoff."""
+    exc = state.outcome.exception()
+    value = exc.response.headers.get("Retry-After") if isinstance(exc, httpx.HTTPStatusError) else None
+    if value:
+        try:
+            delay = float(value)
+        except ValueError:
+            try:
+                delay = (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds()
+            except (TypeError, ValueError):
+                delay = None
+        if delay is not None:
+            return min(max(delay, 0.0), 30.0)
+    return _backoff(state)
+
 @retry(
     stop=stop_after_attempt(3),
-    wait=wait_exponential_jitter(0.5, 2.0),
-    retry=retry_if_exception_type((httpx.HTTPError, Exception)),
+    wait=_retry_wait,
+    retry=retry_if_exception(_is_transient),
     reraise=True,
 )
-async def fetch_text(client: httpx.AsyncClient, url: str, timeout: float = 30.0) -> str:
-    r = await client.get(url, timeout=timeout)
-    r.raise_for_status()
-    return r.text
+async def fetch_bytes(client: httpx.AsyncClient, url: str, timeout: float = 30.0,
+                      cache: FeedCache | None = None, max_bytes: int = 0) -> bytes:
+    """
+    Raw response body; feedparser/trafilatura detect the encoding from the XML/HTML prolog themselves.
+    With `cache`, this is a conditional GET: a 304 Not Modified replays the body stored last time.
+    With `max_bytes`, the body is streamed and cut off there (the rest is never downloaded).
+    """
+    async with client.stream("GET", url, timeout=timeout, headers=cache.validators(url) if cache else None) as r:
+        if r.status_code == 304 and cache is not None and (body := cache.body(url)) is not None:
+            return body
+        r.raise_for_status()
+        chunks: list[bytes] = []
+        size = 0
+        async for chunk in r.aiter_bytes():
+            chunks.append(chunk)
+            size += len(chunk)
+            if max_bytes and size >= max_bytes:
+                break
+    body = b"".join(chunks)[:max_bytes or None]
+    if cache is not None:
+        cache.store(url, r.headers, body)
+    return body
+
+class FeedCache:
+    """
+    Per-feed ETag / Last-Modified validators plus the last body, under DATA_DIR/.feed_cache/.
+    Unchanged feeds then cost a 304 with an empty body instead of a full download,
+    and still yield the same articles.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self._index_path = root / "index.json"
+        self._index: dict[str, dict] = orjson.loads(self._index_path.read_bytes()) if self._index_path.exists() else {}
+
+    def _body_path(self, url: str) -> Path:
+        return self.root / f"{hashlib.sha1(url.encode('utf-8')).hexdigest()}.xml"
+
+    def validators(self, url: str) -> dict[str, str] | None:
+        meta = self._index.get(url)
+        if not meta or not self._body_path(url).exists():
+            return None
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers or None
+
+    def body(self, url: str) -> bytes | None:
+        path = self._body_path(url)
+        return path.read_bytes() if url in self._index and path.exists() else None
+
+    def store(self, url: str, headers: httpx.Headers, body: bytes) -> None:
+        etag, last_modified = headers.get("etag"), headers.get("last-modified")
+        if not etag and not last_modified:
+            self._index.pop(url, None)  # nothing to revalidate with
+            return
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._body_path(url).write_bytes(body)
+        self._index[url] = {"etag": etag, "last_modified": last_modified}
+
+    def save(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._index_path.write_bytes(orjson.dumps(self._index))
 
 # ---- RSS parsing -------------------------------------------------------------
 
+# "[^>]*" can't backtrack, unlike "<.*?>", so long HTML summaries strip in one linear pass
+_TAG_RE = re.compile(r"<[^>]*>")
+
+def _html_text(fragment: str) -> str | None:
+    """
+    Plain text of an HTML summary/content block: parsed with lxml's C HTML parser, so entities are
+    decoded and a ">" inside an attribute doesn't end the tag. Plain text skips the parser.
+    """
+    if "<" not in fragment and "&" not in fragment:
+        return fragment.strip() or None
+    try:
+        text = lxml.html.fragment_fromstring(fragment, create_parent="div").text_content()
+    except (etree.ParserError, ValueError):
+        text = _TAG_RE.sub("", fragment)
+    return text.strip() or None
+
 def _from_feed_entry(entry, src_name: str) -> Article:
     # URL
     url = entry.get("link") or entry.get("id") or ""
@@ -245,8 +420,13 @@ def _from_feed_entry(entry, src_name: str) -> Article:
     elif "authors" in entry and entry["authors"]:
         authors = [a.get("name") for a in entry["authors"] if a.get("name")]
 
-    # Published
+    # Published: feedparser already parsed the date (RSS/RFC 822, Atom/ISO, ...) into UTC
+    # struct_time; store it as ISO 8601 and keep the raw string only when it couldn't parse
     published = entry.get("published") or entry.get("updated")
+    # dict.get: FeedParserDict.get would alias the two keys with a DeprecationWarning when one is missing
+    parsed = dict.get(entry, "published_parsed") or dict.get(entry, "updated_parsed")
+    if parsed:
+        published = datetime(*parsed[:6], tzinfo=timezone.utc).isoformat()
 
     # content:encoded or content[] blocks
     content_text = None
@@ -255,14 +435,15 @@ def _from_feed_entry(entry, src_name: str) -> Article:
         if blocks:
             content_text = max(blocks, key=lambda t: len(t))
 
-    # strip tags roughly
+    # HTML -> text
     if description:
-        description = re.sub("<.*?>", "", description).strip() or None
+        description = _html_text(description)
     if content_text:
-        content_text = re.sub("<.*?>", "", content_text).strip() or None
+        content_text = _html_text(content_text)
 
     ch = sha256(title, url)
-    return Article(
+    # Every field above is already a str / list[str] / None, so skip pydantic's per-field validation
+    return Article.model_construct(
         id=ch,
         source=src_name,
         url=url,
@@ -276,77 +457,341 @@ def _from_feed_entry(entry, src_name: str) -> Article:
         content_hash=ch,
     )
 
-async def parse_feed(client: httpx.AsyncClient, src: Source) -> list[Article]:
-    raw = await fetch_text(client, src.url, timeout=30)
-    fp = feedparser.parse(raw)
-    arts: list[Article] = []
-    for entry in (fp.entries or [])[:MAX_ARTICLES_PER_SOURCE]:
-        art = _from_feed_entry(entry, src.name)
-        arts.append(art)
-    return arts
+_ATOM = "{http://www.w3.org/2005/Atom}"
+_RSS_NS = {"content": "http://purl.org/rss/1.0/modules/content/", "dc": "http://purl.org/dc/elements/1.1/"}
+
+def _parsed_date(value: str | None) -> time.struct_time | None:
+    """RFC 822 (RSS) or ISO 8601 (Atom) date as a UTC struct_time, like feedparser's *_parsed."""
+    if not value:
+        return None
+    try:
+        dt = datetime.fromisoformat(value.strip())
+    except ValueError:
+        try:
+            dt = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc).timetuple()
+
+def _text(el) -> str | None:
+    return "".join(el.itertext()) if el is not None else None
+
+def _lxml_entries(raw: bytes, limit: int) -> list[dict] | None:
+    """
+    Fast path for plain RSS 2.0 / Atom feeds: up to `limit` entries parsed with lxml (C), as dicts
+    holding the keys _from_feed_entry reads from feedparser entries. None = not such a feed.
+    """
+    parser = etree.XMLParser(recover=True, resolve_entities=False, no_network=True)
+    root = etree.fromstring(raw, parser=parser)
+    if root is None:
+        return None
+
+    entries: list[dict] = []
+    if root.tag == "rss":
+        for item in islice(root.iterfind("channel/item"), limit):
+            entry = {
+                "title": item.findtext("title"),
+                "link": item.findtext("link"),
+                "id": item.findtext("guid"),
+                "summary": item.findtext("description"),
+                "author": item.findtext("author") or item.findtext("dc:creator", namespaces=_RSS_NS),
+                "published": item.findtext("pubDate"),
+            }
+            encoded = item.findtext("content:encoded", namespaces=_RSS_NS)
+            if encoded:
+                entry["content"] = [{"value": encoded}]
+            entry["published_parsed"] = _parsed_date(entry["published"])
+            entries.append(entry)
+    elif root.tag == f"{_ATOM}feed":
+        for item in islice(root.iterfind(f"{_ATOM}entry"), limit):
+            links = [l for l in item.iterfind(f"{_ATOM}link") if l.get("rel", "alternate") == "alternate"]
+            entry = {
+                "title": _text(item.find(f"{_ATOM}title")),
+                "link": links[0].get("href") if links else None,
+                "id": item.findtext(f"{_ATOM}id"),
+                "summary": _text(item.find(f"{_ATOM}summary")),
+                "author": item.findtext(f"{_ATOM}author/{_ATOM}name"),
+                "published": item.findtext(f"{_ATOM}published") or item.findtext(f"{_ATOM}updated"),
+            }
+            content = _text(item.find(f"{_ATOM}content"))
+            if content:
+                entry["content"] = [{"value": content}]
+            entry["published_parsed"] = _parsed_date(entry["published"])
+            entries.append(entry)
+    else:
+        return None
+    return entries
+
+def _feed_entries(raw: bytes, limit: int) -> list:
+    """lxml fast path; feedparser (RSS 1.0, odd dialects, broken XML, ...) when it doesn't apply."""
+    try:
+        entries = _lxml_entries(raw, limit)
+    except Exception:
+        entries = None
+    if entries:
+        return entries
+    # Skip feedparser's HTML sanitizer and relative-URI rewriting: _from_feed_entry strips tags itself
+    fp = feedparser.parse(raw, sanitize_html=False, resolve_relative_uris=False)
+    return (fp.entries or [])[:limit]
+
+def _feed_articles(raw: bytes, src_name: str, limit: int) -> list[Article]:
+    return [_from_feed_entry(entry, src_name) for entry in _feed_entries(raw, limit)]
+
+async def parse_feed(client: httpx.AsyncClient, src: Source, cache: FeedCache | None = None) -> list[Article]:
+    raw = await fetch_bytes(client, src.url, timeout=30, cache=cache)
+    # Feed parsing and entry normalization (hashing, HTML -> text) are CPU-bound; run both
+    # in a worker thread so other fetches keep going
+    return await asyncio.to_thread(_feed_articles, raw, src.name, MAX_ARTICLES_PER_SOURCE)
 
 # ---- Article HTML content extraction ----------------------------------------
 
-async def enrich_with_fulltext(client: httpx.AsyncClient, article: Article, semaphore: asyncio.Semaphore) -> None:
-    """Fill article.content if empty by fetching HTML and extracting main text."""
-    if article.content and len(article.content) > 400:
+@lru_cache(maxsize=1)
+def _trafilatura():
+    """
+    trafilatura, imported on first use: its import (dateparser, htmldate, ...) is about half of
+    this module's start-up time, and runs where resiliparse handles every page never need it.
+    """
+    import trafilatura
+    return trafilatura
+
+def _extract(html: bytes, url: str) -> str | None:
+    """
+    Main text of an article page. resiliparse is several times faster than trafilatura;
+    with EXTRACTOR=hybrid (default) trafilatura only runs when resiliparse finds too little text.
+    """
+    if EXTRACTOR != "trafilatura" and HTMLTree is not None:
+        tree = HTMLTree.parse_from_bytes(html, detect_encoding(html))
+        text = extract_plain_text(tree, main_content=True, preserve_formatting=False)
+        if EXTRACTOR == "resiliparse" or (text and len(text.strip()) >= 400):
+            return text
+    return _trafilatura().extract(html, url=url, include_comments=False, include_tables=False)
+
+def _init_extract_worker() -> None:
+    """Process-pool initializer: import the extractor(s) up front instead of on the first page."""
+    if EXTRACTOR == "trafilatura" or HTMLTree is None:
+        _trafilatura()
+
+class _ExtractPool(Executor):
+    """
+    Process pool for _extract, started on the first page that needs it (runs where every article
+    has its full text from the feed or an earlier run never start one). Workers come from a
+    forkserver (spawn where unavailable): forking this process would copy it while feed-parse
+    and resolver threads are running, which can deadlock the child.
+    """
+
+    def __init__(self, workers: int):
+        self._workers = workers
+        self._pool: ProcessPoolExecutor | None = None
+
+    def submit(self, fn, /, *args, **kwargs):
+        if self._pool is None:
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            self._pool = ProcessPoolExecutor(self._workers, mp_context=multiprocessing.get_context(method),
+                                             initializer=_init_extract_worker)
+        return self._pool.submit(fn, *args, **kwargs)
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait, cancel_futures=cancel_futures)
+
+def _has_fulltext(article: Article) -> bool:
+    """The feed already supplied the full text (content:encoded etc.); no page fetch needed."""
+    return bool(article.content) and len(article.content) > 400
+
+async def enrich_with_fulltext(client: httpx.AsyncClient, article: Article, semaphore: asyncio.Semaphore,
+                               pool: Executor | None = None,
+                               host_limits: dict[str, asyncio.Semaphore] | None = None) -> None:
+    """
+    Fill article.content if empty by fetching HTML and extracting main text.
+    With `host_limits`, at most CONTENT_PER_HOST pages per host are downloaded at once; the host slot
+    is taken before the global one, so articles queued behind a busy host don't hold global slots.
+    Extraction runs on `pool` (default: the loop's thread pool) after the download slot is released,
+    so CPU-bound parsing never holds up further page downloads.
+    """
+    if _has_fulltext(article):
         return
     if not CONTENT_FETCH:
         return
 
-    async with semaphore:
+    host_slot = nullcontext()
+    if host_limits is not None:
+        host_slot = host_limits.setdefault(urlsplit(article.url).netloc, asyncio.Semaphore(CONTENT_PER_HOST))
+    async with host_slot, semaphore:
         try:
-            html = await fetch_text(client, article.url, timeout=CONTENT_TIMEOUT)
+            html = await fetch_bytes(client, article.url, timeout=CONTENT_TIMEOUT, max_bytes=CONTENT_MAX_BYTES)
         except Exception as e:
             log(f"Warn[{article.source}]: HTML fetch failed for {article.url} -> {type(e).__name__}: {e}")
             return
 
-        try:
-            text = trafilatura.extract(html, url=article.url, include_comments=False, include_tables=False)
-            if text:
-                clean = text.strip()
-                if len(clean) >= 400:
-                    article.content = clean
-        except Exception as e:
-            log(f"Warn[{article.source}]: extraction failed {article.url} -> {type(e).__name__}: {e}")
+    try:
+        text = await asyncio.get_running_loop().run_in_executor(pool, _extract, html, article.url)
+        if text:
+            clean = text.strip()
+            if len(clean) >= 400:
+                article.content = clean
+    except Exception as e:
+        log(f"Warn[{article.source}]: extraction failed {article.url} -> {type(e).__name__}: {e}")
+
+def previous_fulltext(limit: int = CONTENT_REUSE) -> dict[str, str]:
+    """
+    id -> full text from the newest `limit` news_*.jsonl files in DATA_DIR (newer files win),
+    so articles already fetched by an earlier run skip the page download and extraction.
+    """
+    if limit <= 0:
+        return {}
+    files = sorted(DATA_DIR.glob("news_*.jsonl"), key=lambda p: p.stat().st_mtime)[-limit:]
+    known: dict[str, str] = {}
+    for fp in files:
+        with fp.open("rb", buffering=1 << 20) as f:
+            for line in f:
+                try:
+                    row = orjson.loads(line)
+                except orjson.JSONDecodeError:
+                    continue
+                # Only an optimisation: skip anything that isn't an article row
+                if not isinstance(row, dict) or not isinstance(row.get("id"), str):
+                    continue
+                content = row.get("content")
+                if isinstance(content, str) and len(content) > 400:
+                    known[row["id"]] = content
+    return known
 
 # ---- Orchestration -----------------------------------------------------------
 
-async def gather_all() -> list[Article]:
+# Earliest monotonic time of the next feed request per host
+_host_next: dict[str, float] = {}
+
+async def _throttle(host: str) -> None:
+    """
+    Space requests to `host` ~REQUEST_DELAY apart (jittered so hosts aren't hit in lockstep).
+    The slot is reserved before sleeping, so concurrent callers queue up instead of racing;
+    the first request to a host doesn't wait at all.
+    """
+    now = time.monotonic()
+    slot = max(now, _host_next.get(host, 0.0))
+    _host_next[host] = slot + REQUEST_DELAY * random.uniform(0.5, 1.5)
+    if slot > now:
+        await asyncio.sleep(slot - now)
+
+async def fetch_source(client: httpx.AsyncClient, src: Source, host_limits: dict[str, asyncio.Semaphore],
+                       feed_slots: asyncio.Semaphore, cache: FeedCache | None = None) -> list[Article]:
+    """
+    Fetch one feed. Feeds on the same host share a semaphore and are throttled per host;
+    feed_slots caps feeds in flight overall (not held while waiting on the throttle).
+    """
+    host = urlsplit(src.url).netloc
+    async with host_limits.setdefault(host, asyncio.Semaphore(FEED_PER_HOST)):
+        await _throttle(host)
+        async with feed_slots:
+            arts = await parse_feed(client, src, cache) if src.kind == "rss" else []
+    log(f"OK[{src.name}]: {len(arts)} feed items")
+    return arts
+
+async def gather_all(final: asyncio.Queue[Article | None] | None = None) -> list[Article]:
+    """
+    Fetch every source (and article pages) into one list, one article per id in SOURCES order.
+    With `final`, each article is also put there as soon as it is final (source settled, page text
+    in), while other feeds and pages are still loading; None follows the last one.
+    """
+    try:
+        return await _gather_all(final)
+    finally:
+        if final is not None:
+            final.put_nowait(None)
+
+async def _gather_all(final: asyncio.Queue[Article | None] | None) -> list[Article]:
     out: list[Article] = []
     failures: list[tuple[str, str]] = []
 
+    # HTTP/2 where the server offers it: article pages from one host share a TLS connection
+    # (multiplexed streams) instead of opening one per request; HTTP/1.1 otherwise
     async with httpx.AsyncClient(
         headers={"User-Agent": UA},
         follow_redirects=True,
         trust_env=True,
+        http2=True,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=50, keepalive_expiry=30.0),
     ) as client:
-        # Fetch feeds
-        for src in SOURCES:
-            await asyncio.sleep(REQUEST_DELAY)
-            # DNS hint
-            try:
-                host = re.sub(r"^https?://", "", src.url).split("/")[0]
-                socket.gethostbyname(host)
-            except Exception as e:
-                log(f"Warn[{src.name}]: DNS resolution failed: {e!r}")
-
-            try:
-                if src.kind == "rss":
-                    arts = await parse_feed(client, src)
-                else:
-                    arts = []
-                out.extend(arts)
-                log(f"OK[{src.name}]: {len(arts)} feed items")
-            except Exception as e:
-                failures.append((src.name, f"{type(e).__name__}: {e}"))
-                log(f"Warn[{src.name}]: feed parse failed -> {type(e).__name__}: {e}")
-
-        # Enrich with article full text
-        if CONTENT_FETCH and out:
-            sem = asyncio.Semaphore(CONTENT_CONCURRENCY)
-            tasks = [enrich_with_fulltext(client, a, sem) for a in out]
-            await asyncio.gather(*tasks)
+        # Fetch feeds concurrently; results keep SOURCES order
+        host_limits: dict[str, asyncio.Semaphore] = {}
+        feed_slots = asyncio.Semaphore(FEED_CONCURRENCY)
+        cache = FeedCache(DATA_DIR / ".feed_cache") if FEED_CACHE else None
+
+        sem = asyncio.Semaphore(CONTENT_CONCURRENCY)
+        page_hosts: dict[str, asyncio.Semaphore] = {}
+        pages: dict[str, asyncio.Task] = {}  # id -> the one download of that article's page
+        reused: set[str] = set()
+        known = previous_fulltext() if CONTENT_FETCH else {}
+        # Extraction is CPU-bound: a process pool parses pages on several cores, in parallel
+        # with the downloads (EXTRACT_WORKERS=0 keeps it on the loop's thread pool)
+        pool = _ExtractPool(EXTRACT_WORKERS) if CONTENT_FETCH and EXTRACT_WORKERS > 0 else None
+        try:
+            async def page_text(a: Article) -> str | None:
+                await enrich_with_fulltext(client, a, sem, pool, page_hosts)
+                return a.content if _has_fulltext(a) else None
+
+            async def feed_then_enrich(src: Source) -> list[Article]:
+                """
+                Fetch one feed and start downloading its articles' pages right away, so page
+                downloads overlap with the feeds still in flight. An article listed by several
+                feeds (same title + link) shares one download; which copy is kept is decided
+                in SOURCES order below.
+                """
+                arts = await fetch_source(client, src, host_limits, feed_slots, cache)
+                for a in arts:
+                    # Full text extracted by an earlier run: no download, no extraction
+                    if not _has_fulltext(a) and a.id in known:
+                        a.content = known[a.id]
+                        reused.add(a.id)
+                    # Only articles that still need their page become tasks
+                    if CONTENT_FETCH and not _has_fulltext(a) and a.id not in pages:
+                        pages[a.id] = asyncio.create_task(page_text(a))
+                return arts
+
+            async def settle(a: Article) -> None:
+                """The kept copy gets the text of its shared page download; then it is final."""
+                page = pages.get(a.id)
+                if page is not None and not _has_fulltext(a):
+                    a.content = (await page) or a.content
+                if final is not None:
+                    final.put_nowait(a)
+
+            feeds = [asyncio.create_task(feed_then_enrich(src)) for src in SOURCES]
+            # Take the feeds in SOURCES order as they come in: the first copy of each article is
+            # kept (stable attribution whatever feed answered first) and settles once its page is
+            # in, while later feeds and page downloads are still running
+            seen: set[str] = set()
+            settling: list[asyncio.Task] = []
+            skipped = 0
+            for src, feed in zip(SOURCES, feeds):
+                try:
+                    arts = await feed
+                except Exception as e:
+                    failures.append((src.name, f"{type(e).__name__}: {e}"))
+                    log(f"Warn[{src.name}]: feed parse failed -> {type(e).__name__}: {e}")
+                    continue
+                for a in arts:
+                    if a.id in seen:
+                        skipped += 1
+                        continue
+                    seen.add(a.id)
+                    out.append(a)
+                    settling.append(asyncio.create_task(settle(a)))
+            if cache is not None:
+                cache.save()
+            if skipped:
+                log(f"Skipped {skipped} duplicate feed item(s)")
+            if reused:
+                log(f"Reused full text of {len(reused)} article(s) from earlier runs")
+
+            # Wait for the page downloads still running (including ones only dropped copies wanted)
+            await asyncio.gather(*settling, *pages.values())
+        finally:
+            if pool is not None:
+                # Waiting for the workers to exit blocks: do it off the loop
+                await asyncio.to_thread(pool.shutdown)
 
     if failures:
         log("Some sources failed:")
@@ -355,6 +800,14 @@ async def gather_all() -> list[Article]:
 
     return out
 
+def unique_articles(articles: Iterable[Article]) -> Iterable[Article]:
+    """Articles in order, skipping repeated ids (the same link listed by several feeds)."""
+    seen: set[str] = set()
+    for a in articles:
+        if a.id not in seen:
+            seen.add(a.id)
+            yield a
+
 def write_jsonl(articles: list[Article]) -> Optional[Path]:
     if not articles:
         log("No articles collected; nothing to write.")
@@ -362,19 +815,19 @@ def write_jsonl(articles: list[Article]) -> Optional[Path]:
 
     DATA_DIR.mkdir(parents=True, exist_ok=True)
     fp = DATA_DIR / f"news_{datetime.now(timezone.utc).strftime('%Y%m%d_%H%M%S')}.jsonl"
-    seen: set[str] = set()
 
-    with fp.open("w", encoding="utf-8") as f:
-        for a in articles:
-            if a.id in seen:
-                continue
-            seen.add(a.id)
-            f.write(a.model_dump_json() + "\n")
+    # Stream one orjson line per article; fields only hold plain str/list values,
+    # so the instance dict serializes directly (no model_dump_json pass). The 1 MiB buffer
+    # batches the small writes into few syscalls, as in analysis.py.
+    with fp.open("wb", buffering=1 << 20) as f:
+        for a in unique_articles(articles):
+            f.write(orjson.dumps(vars(a)))
+            f.write(b"\n")
     return fp
 
 def main() -> None:
     console.print(f"[bold]Starting fetch for {len(SOURCES)} sources[/bold] (content_fetch={CONTENT_FETCH})")
-    arts = asyncio.run(gather_all())
+    arts = run_async(gather_all())
 
     # Print per-source stats (chars/words avg & max)
     stats = compute_stats(arts)
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+pipeline.py
+Stages 1+2 in one process: fetch feeds and analyze the fetched articles straight from memory.
+
+Why:
+- Running news_fetcher.py and then analysis.py writes every article to news_data/, reads the file
+  back and parses it again. Here the fetched articles go directly into analysis.py's streaming
+  pipeline (same prompts, cache, dedup and concurrency), and only the analysis JSONL is written.
+- Each article is analyzed as soon as it is final (source settled, page text in), so LLM calls
+  overlap with the slower feeds and page downloads still running. Output lines follow that
+  order rather than SOURCES order.
+- news_fetcher.py / analysis.py / analysis_batch.py stay as they are for per-stage runs and files.
+
+Usage:
+  python pipeline.py               # fetch + analyze -> analysis_results/analysis_*.jsonl
+  python pipeline.py --keep-news   # also write the fetched articles to news_data/ as usual
+
+Configuration is the union of the news_fetcher.py and analysis.py environment toggles.
+"""
+
+from __future__ import annotations
+import sys
+import time
+import asyncio
+from datetime import datetime, timezone
+from typing import AsyncIterator
+
+import orjson
+
+import analysis
+import news_fetcher
+
+def log(msg: str) -> None:
+    print(f"[pipeline] {msg}", flush=True)
+
+async def _lines(final: asyncio.Queue[news_fetcher.Article | None]) -> AsyncIterator[bytes]:
+    """Articles from gather_all as they become final, as the JSONL lines write_jsonl would write."""
+    n = 0
+    while (a := await final.get()) is not None:
+        if analysis.MAX_ITEMS > 0 and n >= analysis.MAX_ITEMS:
+            break
+        n += 1
+        yield orjson.dumps(vars(a))
+
+async def _fetch_and_analyze(keep_news: bool, fout, cache: analysis.AnalysisCache | None) -> dict | None:
+    """Fetch all sources and stream each article into analysis._run once final (one event loop)."""
+    try:
+        final: asyncio.Queue[news_fetcher.Article | None] = asyncio.Queue()
+        fetch = asyncio.create_task(news_fetcher.gather_all(final))
+        counts = await analysis._run(_lines(final), fout, cache)
+        arts = await fetch
+        news_fetcher.print_stats_table(news_fetcher.compute_stats(arts))
+        if not arts:
+            return None
+        if keep_news:
+            log(f"Wrote fetched articles to {news_fetcher.write_jsonl(arts)}")
+        return counts
+    finally:
+        await analysis._HTTP_CLIENT.aclose()
+
+def main() -> None:
+    keep_news = "--keep-news" in sys.argv[1:]
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
+    analysis.OUT_DIR.mkdir(parents=True, exist_ok=True)
+    out_file = analysis.OUT_DIR / f"analysis_{stamp}.jsonl"
+
+    start_ts = time.time()
+    print("=" * 72)
+    print(f"[pipeline] Starting fetch + analysis")
+    print(f"  Sources:                   {len(news_fetcher.SOURCES)} (content_fetch={news_fetcher.CONTENT_FETCH})")
+    print(f"  Model:                     {analysis.MODEL}")
+    print(f"  Output:                    {out_file}")
+    print(f"  News file:                 {'news_data/ (--keep-news)' if keep_news else 'not written'}")
+    print(f"  CONCURRENCY:               {analysis.CONCURRENCY}")
+    print(f"  Cache:                     {analysis.CACHE_PATH if analysis.USE_CACHE else 'off'}")
+    print("=" * 72, flush=True)
+
+    cache = analysis.AnalysisCache(analysis.CACHE_PATH) if analysis.USE_CACHE else None
+    try:
+        with out_file.open("wb", buffering=analysis.IO_BUFFER) as fout:
+            counts = news_fetcher.run_async(_fetch_and_analyze(keep_news, fout, cache))
+    finally:
+        if cache is not None:
+            cache.close()
+    if counts is None:
+        out_file.unlink(missing_ok=True)
+        log("Completed: 0 articles fetched. Check network/DNS or FEED_URLS config.")
+        sys.exit(2)
+
+    succeeded, failed = counts["succeeded"], counts["failed"]
+    wall = time.time() - start_ts
+    print("-" * 72)
+    print(f"[pipeline] Done")
+    print(f"  Output file:  {out_file}")
+    print(f"  Succeeded:    {succeeded}")
+    print(f"  From cache:   {counts['cached']}")
+    print(f"  Duplicates:   {counts['duplicates']} (same title + text, analyzed once)")
+    print(f"  Failed:       {failed}")
+    print(f"  Elapsed:      {wall:.1f}s")
+    print("-" * 72, flush=True)
+
+if __name__ == "__main__":
+    main()
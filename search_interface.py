@@ -8,6 +8,7 @@ What's new (visibility):
 - Auto-build on startup if the vector store is empty, with a spinner and before/after stats.
 - /rebuild (alias: /refresh) shows a spinner and summary.
 - /search and /ask print timing, hit counts, and quick refs for transparency.
+- /ask streams the answer into its panel as tokens arrive (time to first token is reported).
 - Friendlier /stats output.
 
 Commands:
@@ -23,10 +24,15 @@ from __future__ import annotations
 import os
 import shlex
 import time
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Callable, List
 
+import httpx
 from dotenv import load_dotenv
 from rich.console import Console
+from rich.live import Live
+from rich.markup import escape
 from rich.table import Table
 from rich.panel import Panel
 from rich.text import Text
@@ -86,18 +92,47 @@ def print_hits(hits: List[dict], elapsed: float | None = None) -> None:
         table.add_row(source, text, url, sc_str)
     console.print(table)
 
-def rag_answer(db: PureChromaVectorDB, question: str, k: int = 5) -> tuple[str, List[dict], float, float]:
+@lru_cache(maxsize=1)
+def _qa_chain():
+    """
+    Q&A chain, built once on first /ask and reused: one pooled HTTP client keeps the
+    connection to the API warm between questions (sessions that only /search never build it).
+    """
+    http_client = httpx.Client(limits=httpx.Limits(max_keepalive_connections=10), timeout=60.0)
+    llm = ChatOpenAI(model=MODEL, temperature=0.2, http_client=http_client)
+    return QA_PROMPT | llm | StrOutputParser()
+
+def rag_answer(db: PureChromaVectorDB, question: str, k: int = 5,
+               on_token: Callable[[str], None] | None = None) -> tuple[str, List[dict], float, float, float]:
+    """
+    Retrieve k hits and answer from them. The answer is streamed: `on_token` gets each chunk as it
+    arrives. Returns (answer, hits, retrieval s, generation s, time to first token s).
+    """
     t0 = time.time()
-    hits = db.search(question, k=k)
+    if _qa_chain.cache_info().currsize:
+        hits = db.search(question, k=k)
+        chain = _qa_chain()
+    else:
+        # First question: retrieval (query embedding + vector search) doesn't need the chain,
+        # so build it alongside
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            chain_future = pool.submit(_qa_chain)
+            hits = db.search(question, k=k)
+            chain = chain_future.result()
     t_retrieval = time.time() - t0
     context = "\n\n".join([h["text"] for h in hits])
 
     t1 = time.time()
-    llm = ChatOpenAI(model=MODEL, temperature=0.2)
-    chain = QA_PROMPT | llm | StrOutputParser()
-    answer = chain.invoke({"question": question, "context": context})
+    parts: List[str] = []
+    t_first = 0.0
+    for chunk in chain.stream({"question": question, "context": context}):
+        if not parts:
+            t_first = time.time() - t1
+        parts.append(chunk)
+        if on_token is not None:
+            on_token(chunk)
     t_generation = time.time() - t1
-    return answer, hits, t_retrieval, t_generation
+    return "".join(parts), hits, t_retrieval, t_generation, t_first
 
 def pretty_stats(stats: dict, title: str = "Stats") -> None:
     table = Table(title=title, box=box.SIMPLE_HEAVY)
@@ -145,6 +180,104 @@ def maybe_autobuild(db: PureChromaVectorDB) -> None:
             console.print(f"[red]Auto-build failed:[/red] {e2}")
             raise
 
+# --- Commands -----------------------------------------------------------------
+# Each handler takes (db, arg) where arg is the text after the command word;
+# it returns False to end the session.
+
+def _cmd_help(db: PureChromaVectorDB, arg: str) -> bool:
+    console.print("/search <text>   - semantic search")
+    console.print('/ask "question"  - RAG-style Q&A')
+    console.print("/stats           - vector DB stats")
+    console.print("/rebuild         - rebuild vectors from latest analysis file")
+    console.print("/quit            - exit")
+    return True
+
+def _cmd_quit(db: PureChromaVectorDB, arg: str) -> bool:
+    console.print("Bye.")
+    return False
+
+def _cmd_stats(db: PureChromaVectorDB, arg: str) -> bool:
+    try:
+        pretty_stats(db.stats())
+    except Exception as e:
+        console.print(f"[red]Stats error:[/red] {e}")
+    return True
+
+def _cmd_rebuild(db: PureChromaVectorDB, arg: str) -> bool:
+    try:
+        build_and_report(db)
+    except FileNotFoundError:
+        console.print("[red]No analysis file found.[/red] Run [cyan]python analysis.py[/cyan] first.")
+    except Exception as e:
+        console.print(f"[red]Rebuild failed:[/red] {e}")
+    return True
+
+def _cmd_search(db: PureChromaVectorDB, q: str) -> bool:
+    if not q:
+        console.print("Usage: /search your query")
+        return True
+    try:
+        t0 = time.time()
+        hits = db.search(q, k=5)
+        dt = time.time() - t0
+        if not hits:
+            console.print(f"[yellow]No results[/yellow] (in {dt:.2f}s). "
+                          "You may need to /rebuild after running analysis.py.")
+        else:
+            print_hits(hits, elapsed=dt)
+    except Exception as e:
+        console.print(f"[red]Search error:[/red] {e}")
+    return True
+
+def _cmd_ask(db: PureChromaVectorDB, arg: str) -> bool:
+    try:
+        question = " ".join(shlex.split(arg))
+    except Exception:
+        question = arg
+    if not question:
+        console.print('Usage: /ask "your question"')
+        return True
+    streamed: List[str] = []
+
+    def qa_panel(footer: str = "") -> Panel:
+        return Panel.fit(f"[bold]Answer:[/bold]\n{escape(''.join(streamed))}{footer}", title="Q&A", box=box.ROUNDED)
+
+    def on_token(chunk: str) -> None:
+        streamed.append(chunk)
+        live.update(qa_panel())
+
+    try:
+        # The panel fills in as tokens arrive, then gets the timings
+        with Live(qa_panel(), console=console, refresh_per_second=12) as live:
+            _, hits, t_ret, t_gen, t_first = rag_answer(db, question, k=5, on_token=on_token)
+            live.update(qa_panel(
+                f"\n\n[dim]retrieval: {t_ret:.2f}s | first token: {t_first:.2f}s | "
+                f"generation: {t_gen:.2f}s | total: {t_ret + t_gen:.2f}s[/dim]"
+            ))
+
+        # Quick refs from top 3 hits
+        if hits:
+            ref_table = Table(title="Context Sources", box=box.SIMPLE)
+            ref_table.add_column("#", justify="right", no_wrap=True)
+            ref_table.add_column("Source", style="cyan")
+            ref_table.add_column("URL", overflow="fold")
+            for i, h in enumerate(hits[:3], start=1):
+                ref_table.add_row(str(i), h.get("source", "") or "", h.get("url", "") or "")
+            console.print(ref_table)
+    except Exception as e:
+        console.print(f"[red]Q&A error:[/red] {e}")
+    return True
+
+COMMANDS = {
+    "/help": _cmd_help,
+    "/quit": _cmd_quit,
+    "/stats": _cmd_stats,
+    "/rebuild": _cmd_rebuild,
+    "/refresh": _cmd_rebuild,
+    "/search": _cmd_search,
+    "/ask": _cmd_ask,
+}
+
 # --- Main loop ----------------------------------------------------------------
 
 def main() -> None:
@@ -168,84 +301,14 @@ def main() -> None:
         if not raw:
             continue
 
-        if raw.startswith("/help"):
-            console.print("/search <text>   - semantic search")
-            console.print('/ask "question"  - RAG-style Q&A')
-            console.print("/stats           - vector DB stats")
-            console.print("/rebuild         - rebuild vectors from latest analysis file")
-            console.print("/quit            - exit")
+        # Any whitespace separates the command from its argument (/search<TAB>query too)
+        cmd, *rest = raw.split(maxsplit=1)
+        handler = COMMANDS.get(cmd)
+        if handler is None:
+            console.print("Unknown command. Try /help.")
             continue
-
-        if raw.startswith("/quit"):
-            console.print("Bye.")
+        if not handler(db, rest[0] if rest else ""):
             break
 
-        if raw.startswith("/stats"):
-            try:
-                pretty_stats(db.stats())
-            except Exception as e:
-                console.print(f"[red]Stats error:[/red] {e}")
-            continue
-
-        if raw.startswith("/rebuild") or raw.startswith("/refresh"):
-            try:
-                build_and_report(db)
-            except FileNotFoundError:
-                console.print("[red]No analysis file found.[/red] Run [cyan]python analysis.py[/cyan] first.")
-            except Exception as e:
-                console.print(f"[red]Rebuild failed:[/red] {e}")
-            continue
-
-        if raw.startswith("/search"):
-            q = raw[len("/search"):].strip()
-            if not q:
-                console.print("Usage: /search your query")
-                continue
-            try:
-                t0 = time.time()
-                hits = db.search(q, k=5)
-                dt = time.time() - t0
-                if not hits:
-                    console.print(f"[yellow]No results[/yellow] (in {dt:.2f}s). "
-                                  "You may need to /rebuild after running analysis.py.")
-                else:
-                    print_hits(hits, elapsed=dt)
-            except Exception as e:
-                console.print(f"[red]Search error:[/red] {e}")
-            continue
-
-        if raw.startswith("/ask"):
-            try:
-                parts = shlex.split(raw)
-                question = " ".join(parts[1:])
-            except Exception:
-                question = raw[len("/ask"):].strip()
-            if not question:
-                console.print('Usage: /ask "your question"')
-                continue
-            try:
-                answer, hits, t_ret, t_gen = rag_answer(db, question, k=5)
-                console.print(Panel.fit(
-                    f"[bold]Answer:[/bold]\n{answer}\n\n"
-                    f"[dim]retrieval: {t_ret:.2f}s | generation: {t_gen:.2f}s | total: {t_ret + t_gen:.2f}s[/dim]",
-                    title="Q&A", box=box.ROUNDED
-                ))
-
-                # Quick refs from top 3 hits
-                if hits:
-                    ref_table = Table(title="Context Sources", box=box.SIMPLE)
-                    ref_table.add_column("#", justify="right", no_wrap=True)
-                    ref_table.add_column("Source", style="cyan")
-                    ref_table.add_column("URL", overflow="fold")
-                    for i, h in enumerate(hits[:3], start=1):
-                        ref_table.add_row(str(i), h.get("source", "") or "", h.get("url", "") or "")
-                    console.print(ref_table)
-            except Exception as e:
-                console.print(f"[red]Q&A error:[/red] {e}")
-            continue
-
-        console.print("Unknown command. Try /help.")
-
 if __name__ == "__main__":
     main()
-
@@ -1,5 +1,5 @@
 # tests/conftest.py
-# Make tests import the top-level scripts (news_fetcher.py, vector_db.py)
+# Make tests import the top-level scripts (news_fetcher.py, vector_db.py, analysis.py)
 # even if a package directory with the same name exists in the repo.
 import os
 import sys
@@ -40,6 +40,9 @@ os.environ.setdefault("POSTHOG_DISABLED", "1")
 # Avoid failures if tests run without a real OpenAI key
 os.environ.setdefault("OPENAI_API_KEY", "test-key")
 
+# analysis.py builds its ChatOpenAI client at import time, so load it after the key is set
+_load_as("analysis", "analysis.py")
+
 # ---------- Pretty header & summary ----------
 
 def _pkg_ver(name: str) -> str:
@@ -0,0 +1,147 @@
+import asyncio
+import io
+import os
+import time
+
+import orjson
+import pytest
+
+import analysis
+from analysis import _chunk_text, _group_units
+
+def test_group_units_packs_short_and_isolates_long(monkeypatch):
+    monkeypatch.setattr(analysis, "GROUP_SIZE", 2)
+    monkeypatch.setattr(analysis, "GROUP_TOKENS", 60)
+    monkeypatch.setattr(analysis, "SINGLE_SHOT_TOKEN_LIMIT", 50)
+
+    sizes = [10, 10, 10, 70, None, 45, 45]
+    units = list(_group_units(sizes))
+
+    # short texts packed in pairs, the long one alone, the unparsable (None) skipped,
+    # and a group closed early when GROUP_TOKENS would be exceeded
+    assert units == [[0, 1], [3], [2, 5], [6]]
+
+def test_group_units_size_one_disables_grouping(monkeypatch):
+    monkeypatch.setattr(analysis, "GROUP_SIZE", 1)
+    assert list(_group_units([1, 1, None, 1])) == [[0], [1], [3]]
+
+def test_chunk_text_overlaps_and_caps(monkeypatch):
+    # No tokenizer available -> CHARS_PER_TOKEN estimate (4 chars per token)
+    monkeypatch.setattr(analysis, "_encoding", lambda: None)
+    monkeypatch.setattr(analysis, "MAX_CHUNKS", 3)
+
+    assert _chunk_text("abcdefghijkl", 2, 1) == ["abcdefgh", "efghijkl"]
+    assert len(_chunk_text("x" * 400, 10, 0)) == 3
+    assert analysis._count_tokens("abcdefghi") == 3
+
+def test_analysis_cache_roundtrip(tmp_path):
+    cache = analysis.AnalysisCache(tmp_path / "cache.sqlite")
+    key = cache.key("hash-1", "article text")
+    assert cache.get(key) is None
+    cache.put(key, {"summary": "s", "topics": ["a"], "sentiment": "Neutral"})
+    cache.close()
+
+    # persisted across connections; different text -> different key
+    cache = analysis.AnalysisCache(tmp_path / "cache.sqlite")
+    assert cache.get(key) == {"summary": "s", "topics": ["a"], "sentiment": "Neutral"}
+    assert cache.key("hash-1", "edited text") != key
+    cache.close()
+
+def test_latest_jsonl_picks_newest_by_mtime(tmp_path):
+    assert analysis._latest_jsonl(tmp_path) is None
+    old, new = tmp_path / "news_b.jsonl", tmp_path / "news_a.jsonl"
+    old.write_text("{}\n")
+    new.write_text("{}\n")
+    os.utime(old, (1_000, 1_000))
+    os.utime(new, (2_000, 2_000))
+    assert analysis._latest_jsonl(tmp_path) == new
+
+def test_extract_json_handles_fences_and_braces_in_strings():
+    reply = 'Sure!\n```json\n{"summary": "a {curly} \\"quoted\\" text", "topics": ["x"]}\n```\nDone {not json}'
+    payload = analysis._extract_json(reply)
+    assert payload == '{"summary": "a {curly} \\"quoted\\" text", "topics": ["x"]}'
+    assert analysis._extract_json("[1, [2], 3] tail", opener="[") == "[1, [2], 3]"
+    assert analysis._extract_json("{unbalanced") is None
+
+def test_parse_json_reply_falls_back_to_text():
+    info = analysis._parse_json_reply('```json\n{"summary": "ok", "topics": ["a"], "sentiment": "Positive"}\n```')
+    assert info == {"summary": "ok", "topics": ["a"], "sentiment": "Positive"}
+    info = analysis._parse_json_reply("plain words")
+    assert info == {"summary": "plain words", "topics": [], "sentiment": "Neutral"}
+
+def test_rate_limiter_waits_for_request_budget():
+    limiter = analysis.RateLimiter(rpm=600, tpm=0)  # 10 requests/s, bucket of 600
+    limiter.req_avail = 1.0
+
+    async def two_requests():
+        start = time.monotonic()
+        await limiter.acquire(100)
+        await limiter.acquire(100)
+        return time.monotonic() - start
+
+    assert asyncio.run(two_requests()) >= 0.08
+
+def test_llm_retry_skips_non_retryable_errors():
+    calls = []
+
+    @analysis._llm_retry
+    async def bad_request():
+        calls.append(1)
+        raise ValueError("schema mismatch")
+
+    with pytest.raises(ValueError):
+        asyncio.run(bad_request())
+    assert len(calls) == 1
+
+@pytest.mark.parametrize("streamed", [False, True])
+def test_run_keeps_order_and_analyzes_identical_prompts_once(monkeypatch, streamed):
+    monkeypatch.setattr(analysis, "GROUP_SIZE", 1)
+    monkeypatch.setattr(analysis, "FSYNC_EVERY", 0)
+    seen = []
+
+    async def fake_unit(items):
+        seen.extend(it.id for it in items)
+        await asyncio.sleep(0.01 if items[0].id == "a" else 0)  # finish out of order
+        return [({"summary": f"sum-{it.id}", "topics": [], "sentiment": "Neutral"}, analysis.MODEL) for it in items]
+
+    monkeypatch.setattr(analysis, "_analyze_unit", fake_unit)
+
+    def line(id_, title):
+        return orjson.dumps({"id": id_, "source": "s", "url": f"u/{id_}", "title": title,
+                             "content": f"text of {title}", "content_hash": f"h-{id_}"})
+
+    # "c" republishes "a" under another URL (so another content_hash)
+    lines = [line("a", "Story"), line("b", "Other"), b"not json", line("c", "Story")]
+
+    async def arriving():  # lines from a producer (pipeline.py), not a file
+        for ln in lines:
+            await asyncio.sleep(0)
+            yield ln
+
+    out = io.BytesIO()
+    counts = asyncio.run(analysis._run(arriving() if streamed else lines, out))
+
+    rows = [orjson.loads(r) for r in out.getvalue().splitlines()]
+    assert [r["id"] for r in rows] == ["a", "b", "c"]
+    assert rows[2]["summary"] == "sum-a"  # copied from its representative
+    assert sorted(seen) == ["a", "b"]
+    assert (counts["succeeded"], counts["failed"], counts["duplicates"]) == (3, 1, 1)
+
+def test_run_caches_under_the_model_that_answered(monkeypatch, tmp_path):
+    monkeypatch.setattr(analysis, "GROUP_SIZE", 2)
+    monkeypatch.setattr(analysis, "SMALL_MODEL", "small-model")
+    info = {"summary": "s", "topics": [], "sentiment": "Neutral"}
+
+    async def fake_unit(items):
+        # a group with one longer member is served by MODEL, even for its short members
+        return [(info, analysis.MODEL) for _ in items]
+
+    monkeypatch.setattr(analysis, "_analyze_unit", fake_unit)
+    line = orjson.dumps({"id": "a", "source": "s", "url": "u/a", "title": "T", "content": "short", "content_hash": "h-a"})
+    cache = analysis.AnalysisCache(tmp_path / "cache.sqlite")
+    asyncio.run(analysis._run([line], io.BytesIO(), cache))
+
+    assert cache.get(cache.key("h-a", "short", analysis.MODEL)) == info
+    assert cache.get(cache.key("h-a", "short", "small-model")) is None
+    assert cache.lookup("h-a", "short") == info
+    cache.close()
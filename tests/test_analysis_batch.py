@@ -0,0 +1,36 @@
+from types import SimpleNamespace
+
+import orjson
+import pytest
+
+import analysis_batch
+
+class _ExpiredBatches:
+    """Stub of client.batches: every batch is already expired."""
+
+    def retrieve(self, batch_id):
+        return SimpleNamespace(id=batch_id, status="expired", request_counts=None, output_file_id=None)
+
+def test_run_round_drops_dead_batch_from_state(tmp_path):
+    client = SimpleNamespace(batches=_ExpiredBatches())
+    state_file = tmp_path / "news_x_state.json"
+
+    # round2 dies while round1 (already collected) stays resumable
+    state = {"round1": "batch_1", "round2": "batch_2"}
+    state_file.write_bytes(orjson.dumps(state))
+    with pytest.raises(analysis_batch.BatchEndedError):
+        analysis_batch._run_round(client, state, state_file, "round2", [{}], tmp_path / "r2.jsonl", wait=True)
+    assert orjson.loads(state_file.read_bytes()) == {"round1": "batch_1"}
+
+    # nothing left to resume: the state file goes away
+    state = {"round1": "batch_1"}
+    with pytest.raises(analysis_batch.BatchEndedError):
+        analysis_batch._run_round(client, state, state_file, "round1", [{}], tmp_path / "r1.jsonl", wait=True)
+    assert not state_file.exists()
+
+def test_schema_info_accepts_only_schema_replies():
+    good = '{"summary": "s", "topics": ["a"], "sentiment": "Positive"}'
+    assert analysis_batch._schema_info(good) == {"summary": "s", "topics": ["a"], "sentiment": "Positive"}
+    assert analysis_batch._schema_info("```json\n" + good + "\n```") is not None
+    assert analysis_batch._schema_info('{"summary": "s"}') is None
+    assert analysis_batch._schema_info("Sorry, I can't help with that.") is None
@@ -1,10 +1,24 @@
+import asyncio
+import os
 import re
-from news_fetcher import canonicalize_url, sha256
+
+import httpx
+import orjson
+import pytest
+
+import news_fetcher
+from news_fetcher import Article, canonicalize_url, sha256, write_jsonl
 
 def test_canonicalize_url_basic():
     assert canonicalize_url("http://example.com/path/") == "https://example.com/path"
     assert canonicalize_url("https://example.com/path/?a=1&b=2") == "https://example.com/path"
     assert canonicalize_url(" https://example.com/path// ") == "https://example.com/path"
+    assert canonicalize_url("http://Example.com/a/http://b#frag") == "https://example.com/a/http://b"
+
+def test_split_entries_respects_quotes():
+    assert news_fetcher._split_entries("A|https://a/rss,rss;B|https://b/x\nC|https://c/y") == [
+        "A|https://a/rss", "rss", "B|https://b/x", "C|https://c/y"]
+    assert news_fetcher._split_entries('"A|https://a/x,json",B|https://b/x') == ['"A|https://a/x,json"', "B|https://b/x"]
 
 def test_sha256_changes_when_input_changes():
     h1 = sha256("A", "B")
@@ -12,3 +26,148 @@ def test_sha256_changes_when_input_changes():
     assert h1 != h2
     assert re.fullmatch(r"[0-9a-f]{64}", h1)
 
+def test_html_text_decodes_entities_and_quoted_brackets():
+    assert news_fetcher._html_text('<a title=">">Tom</a> &amp; <b>Jerry</b>') == "Tom & Jerry"
+    assert news_fetcher._html_text("  plain text ") == "plain text"
+    assert news_fetcher._html_text("<p> </p>") is None
+
+def test_write_jsonl_skips_repeated_ids_and_roundtrips(tmp_path, monkeypatch):
+    monkeypatch.setattr(news_fetcher, "DATA_DIR", tmp_path)
+    a = Article(id="1", source="S", url="https://x/1", title="T", content_hash="1", authors=["A"])
+    b = Article(id="2", source="S", url="https://x/2", title="U", content_hash="2")
+
+    path = write_jsonl([a, b, a])
+
+    rows = [orjson.loads(line) for line in path.read_bytes().splitlines()]
+    assert rows == [a.model_dump(), b.model_dump()]
+
+def test_fetch_bytes_retries_only_transient_errors():
+    hits = {"/gone": 0, "/flaky": 0}
+
+    def handler(req):
+        hits[req.url.path] += 1
+        if req.url.path == "/gone":
+            return httpx.Response(404)
+        if hits["/flaky"] == 1:
+            return httpx.Response(503, headers={"Retry-After": "0"})  # honored instead of the backoff
+        return httpx.Response(200, content=b"ok")
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            assert await news_fetcher.fetch_bytes(client, "https://x/flaky") == b"ok"
+            with pytest.raises(httpx.HTTPStatusError):
+                await news_fetcher.fetch_bytes(client, "https://x/gone")
+
+    asyncio.run(run())
+    assert hits == {"/gone": 1, "/flaky": 2}
+
+def test_fetch_bytes_caps_body_size():
+    async def run():
+        transport = httpx.MockTransport(lambda req: httpx.Response(200, content=b"x" * 1000))
+        async with httpx.AsyncClient(transport=transport) as client:
+            return await news_fetcher.fetch_bytes(client, "https://x/page", max_bytes=100)
+
+    assert asyncio.run(run()) == b"x" * 100
+
+def test_lxml_feed_entries_match_feedparser():
+    import feedparser
+
+    raw = b"""<?xml version="1.0" encoding="utf-8"?>
+<rss version="2.0" xmlns:content="http://purl.org/rss/1.0/modules/content/"><channel><title>c</title>
+<item><title>Caf\xc3\xa9 &amp; Co</title><link>http://Example.com/a/?utm=1</link>
+<description><![CDATA[<p>Hello <b>world</b></p>]]></description><author>Jane</author>
+<pubDate>Tue, 10 Jun 2025 04:00:00 +0200</pubDate><content:encoded><![CDATA[<div>Full text</div>]]></content:encoded></item>
+<item><title>Second</title><link>https://example.com/b/</link><pubDate>not a date</pubDate></item>
+</channel></rss>"""
+
+    fast = [news_fetcher._from_feed_entry(e, "S") for e in news_fetcher._lxml_entries(raw, 50)]
+    slow = [news_fetcher._from_feed_entry(e, "S") for e in feedparser.parse(raw, sanitize_html=False).entries]
+    assert fast == slow
+    assert fast[0].published_at == "2025-06-10T02:00:00+00:00"
+    assert fast[0].content == "Full text"
+
+def test_fetch_bytes_conditional_get_replays_cached_body(tmp_path):
+    seen_headers = []
+
+    def handler(req):
+        seen_headers.append(req.headers.get("if-none-match"))
+        if req.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, content=b"<rss/>", headers={"ETag": '"v1"'})
+
+    async def fetch_twice():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            cache = news_fetcher.FeedCache(tmp_path)
+            first = await news_fetcher.fetch_bytes(client, "https://x/feed", cache=cache)
+            cache.save()
+            cache = news_fetcher.FeedCache(tmp_path)  # validators persisted across runs
+            return first, await news_fetcher.fetch_bytes(client, "https://x/feed", cache=cache)
+
+    assert asyncio.run(fetch_twice()) == (b"<rss/>", b"<rss/>")
+    assert seen_headers == [None, '"v1"']
+
+def test_previous_fulltext_reads_newest_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(news_fetcher, "DATA_DIR", tmp_path)
+    long_a, long_b = "a" * 500, "b" * 500
+    (tmp_path / "news_1.jsonl").write_bytes(b'{"id": "x", "content": "%s"}\n' % long_a.encode())
+    (tmp_path / "news_2.jsonl").write_bytes(b'{"id": "x", "content": "%s"}\n{"id": "y", "content": "short"}\nnot json\n'
+                                            b'[1, 2]\n{"content": "%s"}\n'
+                                            % (long_b.encode(), long_a.encode()))
+    os.utime(tmp_path / "news_1.jsonl", (1_000, 1_000))
+    os.utime(tmp_path / "news_2.jsonl", (2_000, 2_000))
+
+    assert news_fetcher.previous_fulltext(2) == {"x": long_b}  # newer file wins; short text, non-objects and rows without id skipped
+    assert news_fetcher.previous_fulltext(0) == {}
+
+def test_gather_all_keeps_sources_order_and_downloads_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(news_fetcher, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(news_fetcher, "FEED_CACHE", False)
+    monkeypatch.setattr(news_fetcher, "CONTENT_FETCH", True)
+    monkeypatch.setattr(news_fetcher, "EXTRACT_WORKERS", 0)
+    monkeypatch.setattr(news_fetcher, "SOURCES", [news_fetcher.Source("Slow", "https://a/rss"),
+                                                  news_fetcher.Source("Fast", "https://b/rss")])
+
+    async def fake_fetch_source(client, src, *args):
+        await asyncio.sleep(0.05 if src.name == "Slow" else 0)  # "Fast" answers first
+        return [Article(id="dup", source=src.name, url="https://x/1", title="T", content_hash="h")]
+
+    downloads = []
+
+    async def fake_enrich(client, article, *args):
+        downloads.append(article.source)
+        article.content = "x" * 500
+
+    monkeypatch.setattr(news_fetcher, "fetch_source", fake_fetch_source)
+    monkeypatch.setattr(news_fetcher, "enrich_with_fulltext", fake_enrich)
+
+    arts = asyncio.run(news_fetcher.gather_all())
+
+    assert [(a.source, a.content) for a in arts] == [("Slow", "x" * 500)]  # first in SOURCES wins
+    assert downloads == ["Fast"]  # one shared download
+
+def test_gather_all_hands_over_articles_before_slow_feeds_finish(tmp_path, monkeypatch):
+    monkeypatch.setattr(news_fetcher, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(news_fetcher, "FEED_CACHE", False)
+    monkeypatch.setattr(news_fetcher, "CONTENT_FETCH", False)
+    monkeypatch.setattr(news_fetcher, "SOURCES", [news_fetcher.Source("Fast", "https://a/rss"),
+                                                  news_fetcher.Source("Slow", "https://b/rss")])
+    slow_done = asyncio.Event()
+
+    async def fake_fetch_source(client, src, *args):
+        if src.name == "Slow":
+            await asyncio.sleep(0.05)
+            slow_done.set()
+        return [Article(id=src.name, source=src.name, url=f"https://x/{src.name}", title="T", content_hash="h")]
+
+    monkeypatch.setattr(news_fetcher, "fetch_source", fake_fetch_source)
+
+    async def run():
+        final = asyncio.Queue()
+        fetch = asyncio.create_task(news_fetcher.gather_all(final))
+        first = await final.get()
+        assert first.id == "Fast" and not slow_done.is_set()
+        assert (await final.get()).id == "Slow"
+        assert await final.get() is None
+        return await fetch
+
+    assert [a.id for a in asyncio.run(run())] == ["Fast", "Slow"]
@@ -11,7 +11,6 @@ Updates in this version:
 
 from __future__ import annotations
 import os
-import json
 import logging
 from pathlib import Path
 from typing import Any, List
@@ -34,6 +33,7 @@ for name in (
     logger.handlers = [logging.NullHandler()]
     logger.setLevel(logging.CRITICAL)
 
+import orjson
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -87,8 +87,7 @@ class PureChromaVectorDB:
         self._vs: Chroma | None = None
 
     def _latest_file(self) -> Path | None:
-        files = sorted(ANALYSIS_DIR.glob("*.jsonl"), reverse=True)
-        return files[0] if files else None
+        return max(ANALYSIS_DIR.glob("*.jsonl"), key=lambda p: p.stat().st_mtime, default=None)
 
     def _load_vectorstore(self) -> Chroma:
         if self._vs is None:
@@ -108,10 +107,17 @@ class PureChromaVectorDB:
 
         docs: List[Document] = []
         ids: List[str] = []
+        seen: set[str] = set()
 
-        with path.open("r", encoding="utf-8") as f:
+        with path.open("rb") as f:
             for line in f:
-                rec = json.loads(line)
+                rec = orjson.loads(line)
+                # id is the article's content_hash; index each article once
+                # (Chroma rejects duplicate ids within one add)
+                doc_id = str(rec.get("id"))
+                if doc_id in seen:
+                    continue
+                seen.add(doc_id)
 
                 # Content to index: prefer summary, then full content, then description/title
                 text = (
@@ -135,7 +141,7 @@ class PureChromaVectorDB:
                 })
 
                 docs.append(Document(page_content=content, metadata=meta))
-                ids.append(str(rec.get("id")))
+                ids.append(doc_id)
 
         # Chroma 0.4.x persists automatically; no explicit persist() call needed
         vs = Chroma.from_documents(